@@ -43,9 +43,9 @@ def extract_file_info(json_data: Dict[str, Any]) -> Dict[str, List]:
 
 # ...existing imports and extract_file_info function...
 
-def main():
+def main(blueprint_path=None):
     try:
-        file_path = get_latest_blueprint()
+        file_path = blueprint_path or get_latest_blueprint()
         with open(file_path, 'r') as file:
             json_data = json.load(file)
             files_info = extract_file_info(json_data)
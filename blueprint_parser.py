@@ -0,0 +1,224 @@
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.messages import HumanMessage
+
+THINK_OPEN = '<think>'
+THINK_CLOSE = '</think>'
+
+
+def validate_blueprint(data) -> List[str]:
+    """Schema check for the PM blueprint; returns a list of problems (empty when valid)"""
+    if not isinstance(data, dict):
+        return ["blueprint must be a JSON object"]
+    errors = []
+    if not isinstance(data.get('service_name'), str) or not data.get('service_name', '').strip():
+        errors.append("'service_name' must be a non-empty string")
+    files = data.get('files')
+    if not isinstance(files, dict) or not files:
+        errors.append("'files' must be a non-empty object mapping file names to file info")
+    else:
+        for filename, info in files.items():
+            if not isinstance(info, dict):
+                errors.append(f"files['{filename}'] must be an object")
+                continue
+            if not isinstance(info.get('description'), str):
+                errors.append(f"files['{filename}'].description must be a string")
+            for field in ('dependencies', 'key_functions'):
+                if not isinstance(info.get(field, []), list):
+                    errors.append(f"files['{filename}'].{field} must be a list")
+    technologies = data.get('technologies')
+    if not isinstance(technologies, dict) or not isinstance(technologies.get('language'), str):
+        errors.append("'technologies.language' must be a string")
+    return errors
+
+
+def normalize_blueprint(data: Dict) -> Dict:
+    """Fill in fields the rest of the pipeline relies on but the model may get wrong"""
+    for info in data['files'].values():
+        info.setdefault('dependencies', [])
+        info.setdefault('key_functions', [])
+    data['total_files'] = len(data['files'])
+    return data
+
+
+class StreamingBlueprintParser:
+    """Incrementally finds the blueprint JSON object in a streamed PM response.
+
+    Text inside <think> blocks is skipped, braces inside JSON strings are
+    ignored, and every balanced top-level object is parsed and validated as
+    soon as its closing brace arrives.
+    """
+
+    def __init__(self, validator: Callable[[Dict], List[str]] = validate_blueprint):
+        self.validator = validator
+        self.text = []            # Everything received, for diagnostics and repair
+        self.pending = ''         # Tail that may hold a partial <think> tag
+        self.in_think = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.current = []         # Characters of the object being read
+        self.result = None
+        self.candidate = None     # Last object that parsed but failed validation
+        self.errors: List[str] = []
+
+    def feed(self, chunk: str) -> Optional[Dict]:
+        """Consume a chunk; returns the blueprint once a complete valid one has been seen"""
+        self.text.append(chunk)
+        if self.result is not None:
+            return self.result
+        data = self.pending + chunk
+        self.pending = ''
+        index = 0
+        while index < len(data) and self.result is None:
+            if self.in_think:
+                end = data.find(THINK_CLOSE, index)
+                if end == -1:
+                    # Keep enough to recognise a closing tag split across chunks
+                    self.pending = data[max(index, len(data) - len(THINK_CLOSE) + 1):]
+                    return None
+                self.in_think = False
+                index = end + len(THINK_CLOSE)
+                continue
+            char = data[index]
+            if self.depth == 0 and char == '<':
+                if data.startswith(THINK_OPEN, index):
+                    self.in_think = True
+                    index += len(THINK_OPEN)
+                    continue
+                if THINK_OPEN.startswith(data[index:]):
+                    self.pending = data[index:]
+                    return None
+            self._consume(char)
+            index += 1
+        return self.result
+
+    def _consume(self, char: str):
+        if self.depth == 0:
+            if char == '{':
+                self.depth, self.current = 1, ['{']
+            return
+        self.current.append(char)
+        if self.in_string:
+            if self.escaped:
+                self.escaped = False
+            elif char == '\\':
+                self.escaped = True
+            elif char == '"':
+                self.in_string = False
+        elif char == '"':
+            self.in_string = True
+        elif char == '{':
+            self.depth += 1
+        elif char == '}':
+            self.depth -= 1
+            if self.depth == 0:
+                self._complete(''.join(self.current))
+
+    def _complete(self, raw: str):
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            # Prose like "{the layout}" outside a think block
+            return
+        errors = self.validator(data)
+        if errors:
+            if self.candidate is None or len(json.dumps(data)) >= len(json.dumps(self.candidate)):
+                self.candidate, self.errors = data, errors
+            return
+        self.result = data
+
+    def finish(self) -> Optional[Dict]:
+        """Call once the stream ends; retries every '{' in the visible text as a fallback"""
+        if self.result is not None:
+            return self.result
+        text = strip_reasoning(''.join(self.text))
+        decoder = json.JSONDecoder()
+        start = text.find('{')
+        while start != -1 and self.result is None:
+            try:
+                data, _ = decoder.raw_decode(text, start)
+                errors = self.validator(data)
+                if errors:
+                    if self.candidate is None:
+                        self.candidate, self.errors = data, errors
+                else:
+                    self.result = data
+            except json.JSONDecodeError:
+                pass
+            start = text.find('{', start + 1)
+        if self.result is None and not self.errors:
+            self.errors = ["no complete JSON object found in the response"]
+        return self.result
+
+
+def strip_reasoning(text: str) -> str:
+    """Remove <think>...</think> blocks (and an unterminated trailing one)"""
+    out, index = [], 0
+    while True:
+        start = text.find(THINK_OPEN, index)
+        if start == -1:
+            out.append(text[index:])
+            break
+        out.append(text[index:start])
+        end = text.find(THINK_CLOSE, start)
+        if end == -1:
+            break
+        index = end + len(THINK_CLOSE)
+    return ''.join(out)
+
+
+def non_empty_object(data) -> List[str]:
+    return [] if isinstance(data, dict) and data else ["expected a non-empty JSON object"]
+
+
+def extract_json(content: str, validator: Callable[[Dict], List[str]] = non_empty_object) -> Optional[Dict]:
+    """Parse the first JSON object in a complete response that passes ``validator``"""
+    parser = StreamingBlueprintParser(validator)
+    parser.feed(content)
+    return parser.finish()
+
+
+def stream_response(llm, messages, parser: StreamingBlueprintParser) -> str:
+    """Stream a completion into ``parser``, stopping as soon as it has a valid result.
+
+    Falls back to a single invoke for models that cannot stream. Returns the
+    text received.
+    """
+    if hasattr(llm, 'stream'):
+        for chunk in llm.stream(messages):
+            if parser.feed(chunk.content if hasattr(chunk, 'content') else str(chunk)) is not None:
+                # Closing the stream here stops paying for tokens after the blueprint
+                break
+    else:
+        parser.feed(llm.invoke(messages).content)
+    parser.finish()
+    return ''.join(parser.text)
+
+
+def request_blueprint(llm, messages, repairs: int = 1) -> Tuple[Optional[Dict], str]:
+    """Stream the PM response into a validated blueprint, with targeted repair on failure.
+
+    Returns (blueprint or None, raw response text).
+    """
+    parser = StreamingBlueprintParser()
+    raw = stream_response(llm, messages, parser)
+    for attempt in range(repairs):
+        if parser.result is not None:
+            break
+        print(f"⚠️ Blueprint invalid ({'; '.join(parser.errors)}), requesting a targeted repair")
+        broken = json.dumps(parser.candidate, indent=2) if parser.candidate is not None \
+            else strip_reasoning(raw).strip()[-6000:]
+        repair_prompt = f"""The following project blueprint is invalid:
+{broken}
+
+Problems:
+{chr(10).join(f'- {error}' for error in parser.errors)}
+
+Fix ONLY these problems and keep everything else unchanged.
+Return ONLY the corrected JSON object with "service_name", "files", "total_files" and "technologies"."""
+        parser = StreamingBlueprintParser()
+        raw = stream_response(llm, [messages[0], HumanMessage(content=repair_prompt)], parser)
+    if parser.result is not None:
+        normalize_blueprint(parser.result)
+    return parser.result, raw
@@ -1,9 +1,29 @@
 import os
 from pathlib import Path
 import re
-from typing import List
+import json
+import time
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional
 import agents_tasks
 
+# Formatters are optional: without them files are only extracted, not formatted
+try:
+    import black
+except ImportError:
+    black = None
+try:
+    import isort
+except ImportError:
+    isort = None
+
+# Worker pool shared by every formatting pass so black/isort are imported once per worker
+_format_pool: Optional[ProcessPoolExecutor] = None
+_format_pool_lock = threading.Lock()
+
 
 
 
@@ -34,45 +54,104 @@ def remove_template_text(content: str) -> str:
     
     return content
 
-def clean_file(file_path: str) -> bool:
-    """Clean a single file while preserving actual code"""
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def format_source(file_path: str, content: str) -> str:
+    """Extract the code from an LLM response and format it (Python: isort + black)"""
+    cleaned = remove_template_text(content)
+    if not file_path.endswith('.py') or not cleaned.strip():
+        return cleaned
     try:
-        print(f"\n🧹 Cleaning: {file_path}")
-        
-        # Read file content
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        
-        # Clean content
-        cleaned_content = remove_template_text(content)
-        
-        # Don't write if cleaning resulted in empty content
-        if not cleaned_content.strip():
-            print(f"⚠️ Warning: Cleaning would result in empty file, skipping {file_path}")
-            return False
-        
-        # Write back to file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(cleaned_content)
-            
-        print(f"✨ Cleaned: {file_path}")
-        return True
-        
+        if isort is not None:
+            # Black's profile, so black does not undo isort's wrapping
+            cleaned = isort.code(cleaned, profile='black')
+        if black is not None:
+            cleaned = black.format_str(cleaned, mode=black.Mode())
+    except Exception:
+        # Code black cannot parse is left for the debugger to fix
+        pass
+    return cleaned
+
+def _format_job(job):
+    """Process pool entry point: (path, content) -> result dict"""
+    file_path, content = job
+    started = time.perf_counter()
+    try:
+        return {'path': file_path, 'content': format_source(file_path, content),
+                'error': None, 'seconds': time.perf_counter() - started}
     except Exception as e:
-        print(f"❌ Error cleaning {file_path}: {e}")
-        return False
-
-def main(directory: str = "generated_files") -> bool:
-    """Clean all files in the directory"""
+        return {'path': file_path, 'content': None,
+                'error': str(e), 'seconds': time.perf_counter() - started}
+
+def _get_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    global _format_pool
+    with _format_pool_lock:
+        if _format_pool is None:
+            # The service and load tests are multi-threaded; forking them could copy a
+            # lock held by another thread into the worker, so workers come from a forkserver
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _format_pool = ProcessPoolExecutor(max_workers=workers,
+                                               mp_context=multiprocessing.get_context(method))
+        return _format_pool
+
+def format_files(files: List[Path], cache_path: Path, workers: Optional[int] = None) -> Dict[str, Dict]:
+    """Clean and format a batch of files in one pass.
+
+    Files whose content hash matches the output of the previous pass are
+    skipped. Returns per-file results with status and timing.
+    """
+    try:
+        cache = json.loads(Path(cache_path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        cache = {}
+
+    results = {}
+    jobs = []
+    for file_path in files:
+        key = str(Path(file_path).resolve())
+        try:
+            content = Path(file_path).read_text(encoding='utf-8')
+        except OSError as e:
+            results[str(file_path)] = {'status': 'failed', 'error': str(e), 'seconds': 0.0}
+            continue
+        if cache.get(key) == content_hash(content):
+            results[str(file_path)] = {'status': 'unchanged', 'error': None, 'seconds': 0.0}
+            continue
+        jobs.append((str(file_path), content))
+
+    if len(jobs) > 1:
+        outputs = list(_get_pool(workers).map(_format_job, jobs))
+    else:
+        outputs = [_format_job(job) for job in jobs]
+
+    for output in outputs:
+        file_path = output['path']
+        if output['error'] or not (output['content'] or '').strip():
+            # Don't write if cleaning resulted in empty content
+            results[file_path] = {'status': 'failed', 'seconds': output['seconds'],
+                                  'error': output['error'] or 'cleaning would result in empty file'}
+            continue
+        Path(file_path).write_text(output['content'], encoding='utf-8')
+        cache[str(Path(file_path).resolve())] = content_hash(output['content'])
+        results[file_path] = {'status': 'formatted', 'error': None, 'seconds': output['seconds']}
+
+    Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+    Path(cache_path).write_text(json.dumps(cache, indent=2), encoding='utf-8')
+    return results
+
+def main(directory: str = "generated_files", agents_task: List = None) -> bool:
+    """Clean and format all generated files in a single batch"""
     try:
         # Create base directory if it doesn't exist
         base_dir = Path(directory)
         base_dir.mkdir(parents=True, exist_ok=True)
         
         # Get all files with their full paths
+        if agents_task is None:
+            agents_task = agents_tasks.main()
         files = []
-        for file_info in agents_tasks.main():
+        for file_info in agents_task:
             # Get the file path from agents_tasks
             relative_path = file_info[0]
             # Join with base directory to get full path
@@ -86,26 +165,22 @@ def main(directory: str = "generated_files") -> bool:
             return True
             
         print(f"\n🧹 Starting cleanup of {len(files)} files...")
-        
-        cleaned_files = []
-        failed_files = []
-        
-        # Process each file
-        for file_path in files:
-            if clean_file(str(file_path)):
-                cleaned_files.append(str(file_path))
-            else:
-                failed_files.append(str(file_path))
+        started = time.perf_counter()
+        results = format_files(files, base_dir.parent / '.format_cache.json')
         
         # Print summary
         print("\n=== Cleanup Summary ===")
-        print(f"✅ Successfully cleaned: {len(cleaned_files)}/{len(files)}")
+        for file_path, result in results.items():
+            print(f"⏱️ {file_path}: {result['status']} in {result['seconds']:.3f}s")
+        failed_files = [path for path, result in results.items() if result['status'] == 'failed']
+        print(f"✅ Successfully cleaned: {len(files) - len(failed_files)}/{len(files)}")
         print(f"❌ Failed to clean: {len(failed_files)}/{len(files)}")
+        print(f"Total: {time.perf_counter() - started:.3f}s")
         
         if failed_files:
             print("\nFailed files:")
             for file in failed_files:
-                print(f"- {file}")
+                print(f"- {file}: {results[file]['error']}")
         
         return len(failed_files) == 0
         
@@ -1,23 +1,24 @@
 import json
 import os
 from pathlib import Path
-from glob import glob
+from registry import get_registry
 
-def get_latest_blueprint():
-    """Get the most recently created blueprint file from outputs directory."""
-    output_dir = Path('outputs')
+def get_latest_blueprint(output_dir='outputs', run_id=None):
+    """Get the blueprint of ``run_id`` (or of the most recent run) from the run registry."""
+    output_dir = Path(output_dir)
     if not output_dir.exists():
         raise FileNotFoundError("outputs directory not found")
     
-    # Get all JSON files in the outputs directory
-    blueprint_files = glob(str(output_dir / '*_blueprint.json'))
+    # Existing *_blueprint.json files are imported the first time the registry is opened
+    registry = get_registry(output_dir / 'runs.db')
+    run = registry.get(run_id) if run_id else registry.latest()
     
-    if not blueprint_files:
+    if run is None or not run['blueprint_path']:
+        if run_id:
+            raise FileNotFoundError(f"No blueprint recorded for run {run_id}")
         raise FileNotFoundError("No blueprint files found in outputs directory")
     
-    # Get the most recently modified file
-    latest_file = max(blueprint_files, key=os.path.getmtime)
-    return latest_file
+    return run['blueprint_path']
 
 def read_blueprint(blueprint_path):
     """Read the JSON blueprint file."""
@@ -41,13 +42,13 @@ def create_file_content(file_info):
     
     return '\n'.join(content)
 
-def generate_files(blueprint):
+def generate_files(blueprint, base_dir='generated_files'):
     """Generate all files from the blueprint."""
     service_name = blueprint['service_name']
-    base_dir = Path('generated_files')  # Changed from f'generated_{service_name}'
+    base_dir = Path(base_dir)  # Changed from f'generated_{service_name}'
     
     # Create base directory
-    base_dir.mkdir(exist_ok=True)
+    base_dir.mkdir(parents=True, exist_ok=True)
     
     # Create files
     for filename, file_info in blueprint['files'].items():
@@ -64,13 +65,13 @@ def generate_files(blueprint):
         
         print(f'Created: {file_path}')
 
-def main():
+def main(blueprint_path=None, base_dir='generated_files'):
     try:
-        blueprint_path = get_latest_blueprint()
+        blueprint_path = blueprint_path or get_latest_blueprint()
         print(f"Using blueprint: {blueprint_path}")
         
         blueprint = read_blueprint(blueprint_path)
-        generate_files(blueprint)
+        generate_files(blueprint, base_dir)
         print(f"\nSuccessfully generated files for {blueprint['service_name']} microservice")
         print(f"Total files created: {blueprint['total_files']}")
         
@@ -0,0 +1,120 @@
+import time
+import threading
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage runs out of its time budget"""
+
+    def __init__(self, stage: str = None):
+        self.stage = stage
+        super().__init__(f"Deadline exceeded{f' during {stage}' if stage else ''}")
+
+
+class Deadline:
+    """Absolute point in time a request (or one of its stages) must finish by"""
+
+    def __init__(self, seconds: Optional[float] = None, stage: str = None, parent: 'Deadline' = None):
+        self.stage = stage
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        # A child deadline can never outlive its parent
+        if parent is not None and parent.expires_at is not None:
+            if self.expires_at is None or parent.expires_at < self.expires_at:
+                self.expires_at = parent.expires_at
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None if unbounded"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self):
+        """Raise DeadlineExceeded if the budget is spent"""
+        if self.expired():
+            raise DeadlineExceeded(self.stage)
+
+    def timeout(self, cap: Optional[float] = None) -> Optional[float]:
+        """Timeout to hand to a blocking call: the remaining budget, capped"""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        return remaining if cap is None else min(cap, remaining)
+
+    def child(self, fraction: float, stage: str) -> 'Deadline':
+        """Deadline for a stage getting ``fraction`` of what is left of this one"""
+        remaining = self.remaining()
+        seconds = None if remaining is None else remaining * fraction
+        return Deadline(seconds, stage=stage, parent=self)
+
+
+def call_with_deadline(fn, deadline: Optional[Deadline], *args, **kwargs):
+    """Run ``fn`` but stop waiting for it once the deadline passes.
+
+    The call runs on a daemon thread so a stuck HTTP request can be abandoned
+    without blocking the pipeline; its eventual result is discarded.
+    """
+    if deadline is None or deadline.remaining() is None:
+        return fn(*args, **kwargs)
+    deadline.check()
+
+    outcome = {}
+    done = threading.Event()
+
+    def target():
+        try:
+            outcome['value'] = fn(*args, **kwargs)
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=target, daemon=True).start()
+    if not done.wait(deadline.remaining()):
+        raise DeadlineExceeded(deadline.stage)
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['value']
+
+
+class DeadlineLLM:
+    """Chat model wrapper that bounds every call by a stage deadline"""
+
+    def __init__(self, llm, deadline: Deadline):
+        self.llm = llm
+        self.deadline = deadline
+
+    def invoke(self, messages, **kwargs):
+        return call_with_deadline(self.llm.invoke, self.deadline, messages, **self._request_kwargs(kwargs))
+
+    def stream(self, messages, **kwargs):
+        """Yield response chunks, giving up on the stream once the deadline passes"""
+        if not hasattr(self.llm, 'stream'):
+            yield self.invoke(messages, **kwargs)
+            return
+        chunks = iter(self.llm.stream(messages, **self._request_kwargs(kwargs)))
+        while True:
+            try:
+                chunk = call_with_deadline(next, self.deadline, chunks)
+            except StopIteration:
+                return
+            yield chunk
+
+    def _request_kwargs(self, kwargs):
+        """Give the provider request its own timeout, so a call we stop waiting for also ends.
+
+        Only for clients with a ``request_timeout`` setting (ChatGroq, ChatOpenAI),
+        which accept ``timeout`` per request. Every client retry gets that
+        timeout again, so the budget is split across the attempts.
+        """
+        remaining = self.deadline.remaining()
+        if remaining is None or 'timeout' in kwargs or not hasattr(self.llm, 'request_timeout'):
+            return kwargs
+        attempts = (getattr(self.llm, 'max_retries', 0) or 0) + 1
+        return {**kwargs, 'timeout': max(remaining / attempts, 0.001)}
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
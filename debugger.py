@@ -1,17 +1,33 @@
-import subprocess
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 from pathlib import Path
 import os
 import ast
+import subprocess
 import pylint.lint
 from langchain_core.messages import SystemMessage, HumanMessage
 import get_language 
 import cleaning
+import patching
+import toolchains
+import triage
+from deadline import Deadline, DeadlineExceeded
 
 class DebuggerAgent:
-    def __init__(self, llm, output_dir: str = "generated_files"):
+    def __init__(self, llm, output_dir: str = "generated_files", blueprint_path: str = None,
+                 deadline: Optional[Deadline] = None, exec_timeout: float = 60,
+                 repair_mode: str = "patch", context_lines: int = 20):
         self.llm = llm
         self.output_dir = Path(output_dir)
+        self.blueprint_path = blueprint_path
+        self.language_info = None  # Resolved once from the blueprint on first execution
+        # Compiled-language build outputs are cached by source hash across correction rounds
+        self.build_cache = toolchains.BuildCache(self.output_dir.parent / ".build_cache")
+        self.deadline = deadline
+        self.exec_timeout = exec_timeout  # Upper bound for a single execution of generated code
+        self.truncated = False
+        # "patch" asks for a unified diff around the failing region, "rewrite" for the whole file
+        self.repair_mode = repair_mode
+        self.context_lines = context_lines
         self.correction_attempts = {}  # Track attempts per file
         self.system_prompt = """You are an expert code debugger and software architect with deep knowledge of all programming languages.
 Your task is to fix ANY code issue, no matter how complex.
@@ -29,13 +45,20 @@ If the code has complex issues, break down the fix into steps:
 
 You MUST return complete, working code that can be executed without errors."""
 
-    def check_syntax(self, content: str) -> List[str]:
-        """Check for syntax errors using ast"""
+    def check_syntax(self, content: str, file_path: str = None) -> List[str]:
+        """Check for syntax errors with the file's toolchain (ast for Python)"""
         try:
-            ast.parse(content)
-            return []
+            if file_path is None:
+                ast.parse(content)
+                return []
+            timeout = self.deadline.timeout(self.exec_timeout) if self.deadline else self.exec_timeout
+            return self.build_cache.check_syntax(file_path, content, self.language(), self.output_dir, timeout)
         except SyntaxError as e:
             return [f"Syntax error on line {e.lineno}: {e.msg}"]
+        except (subprocess.TimeoutExpired, OSError) as e:
+            # A hung or missing checker is not a defect in the code
+            print(f"⚠️ Syntax check of {file_path} could not run: {e}")
+            return []
         except Exception as e:
             return [str(e)]
 
@@ -48,12 +71,22 @@ You MUST return complete, working code that can be executed without errors."""
         except Exception:
             return []
 
-    def analyze_code(self, file_path: str, content: str) -> Dict:
-        """Comprehensive code analysis"""
+    def static_issues(self, file_path: str) -> List[str]:
+        """Triage's static findings for the file on disk: imports, undefined names, entry point"""
+        verdict = triage.triage_file(self.output_dir, file_path, self.language(), self.build_cache,
+                                     execute=False)
+        return verdict['code_issues']
+
+    def analyze_code(self, file_path: str, content: str, static_issues: List[str] = None) -> Dict:
+        """Comprehensive code analysis; ``static_issues`` reuses findings triage already made"""
+        syntax_errors = self.check_syntax(content, file_path)
+        if static_issues is None:
+            static_issues = self.static_issues(file_path)
         return {
-            'syntax_errors': self.check_syntax(content),
+            'syntax_errors': syntax_errors,
+            'static_issues': [issue for issue in static_issues if issue not in syntax_errors],
             'lint_issues': self.check_linting(file_path),
-            'ast_valid': len(self.check_syntax(content)) == 0
+            'ast_valid': len(syntax_errors) == 0
         }
 
     def correct_error(self, file_info: Tuple, error: str, content: str, analysis: Dict) -> str:
@@ -63,15 +96,24 @@ You MUST return complete, working code that can be executed without errors."""
         # Track complexity of the error
         has_syntax_errors = bool(analysis['syntax_errors'])
         has_runtime_errors = error is not True
+        has_static_issues = bool(analysis['static_issues'])
         has_lint_issues = bool(analysis['lint_issues'])
         
         # Build progressive correction prompt
         correction_focus = "structural and syntax fixes"
         if not has_syntax_errors and has_runtime_errors:
             correction_focus = "runtime error fixes and functionality"
+        elif not has_syntax_errors and has_static_issues:
+            correction_focus = "undefined names, broken imports and missing entry points"
         elif not has_syntax_errors and not has_runtime_errors and has_lint_issues:
             correction_focus = "code quality and optimization"
 
+        if self.repair_mode == "patch":
+            patched = self.correct_error_patch(file_info, error, content, analysis, correction_focus)
+            if patched is not None:
+                return patched
+            print("↩️ Patch could not be applied, falling back to a full rewrite")
+
         prompt = f"""Fix this code with focus on {correction_focus}:
 
 File Context:
@@ -82,6 +124,7 @@ Key Functions: {', '.join(key_functions)}
 Current Issues:
 Syntax Errors: {', '.join(analysis['syntax_errors']) if has_syntax_errors else 'None'}
 Runtime Error: {error if has_runtime_errors else 'None'}
+Static Analysis Issues: {', '.join(analysis['static_issues']) if has_static_issues else 'None'}
 Linting Issues: {', '.join(analysis['lint_issues']) if has_lint_issues else 'None'}
 
 Code to Fix:
@@ -104,27 +147,118 @@ Return ONLY the corrected code."""
         response = self.llm.invoke(messages)
         return cleaning.remove_template_text(response.content)
 
-    def recursive_correction(self, file_info: Tuple, content: str, max_depth: int = 3) -> str:
-        """Recursively attempt to fix code until it works"""
+    def correct_error_patch(self, file_info: Tuple, error: str, content: str, analysis: Dict,
+                            correction_focus: str) -> Optional[str]:
+        """Ask for a unified diff against the failing region and apply it locally.
+
+        Returns the patched code, or None if the diff is missing, does not apply,
+        or introduces syntax errors the file did not already have.
+        """
+        file_path, description, dependencies, key_functions = file_info
+        error_lines = patching.locate_error_lines(file_path, error,
+                                                  analysis['syntax_errors'] + analysis['static_issues'])
+        start, end, region = patching.extract_region(content, error_lines, self.context_lines)
+
+        prompt = f"""Fix this code with focus on {correction_focus}.
+
+File: {file_path}
+Description: {description}
+Dependencies: {', '.join(dependencies)}
+Key Functions: {', '.join(key_functions)}
+
+Current Issues:
+Syntax Errors: {', '.join(analysis['syntax_errors']) or 'None'}
+Runtime Error: {error if error is not True else 'None'}
+Static Analysis Issues: {', '.join(analysis['static_issues']) or 'None'}
+
+Lines {start}-{end} of {file_path} (the file has {len(content.splitlines())} lines), each prefixed with its line number and " | ":
+{patching.number_lines(region, start)}
+
+Return ONLY a unified diff against {file_path} that fixes the issues:
+- Start with "--- a/{file_path}" and "+++ b/{file_path}"
+- Use @@ -start,count +start,count @@ hunk headers with the line numbers shown above
+- Do not copy the "N | " prefixes into the diff
+- Include 3 unchanged context lines around every change
+- Change only the lines needed; do not repeat unchanged code"""
+
+        messages = [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content=prompt)
+        ]
+
+        response = self.llm.invoke(messages)
+        diff = patching.extract_diff(response.content)
+        if not diff:
+            return None
+        try:
+            patched = patching.apply_unified_diff(content, diff)
+        except patching.PatchError as e:
+            print(f"⚠️ {e}")
+            return None
+
+        # Validate locally: a patch must not make the syntax worse
+        if self.check_syntax(patched, file_path) and not analysis['syntax_errors']:
+            return None
+        print(f"🩹 Applied patch to lines {start}-{end} of {file_path}")
+        return patched
+
+    def recursive_correction(self, file_info: Tuple, content: str, max_depth: int = 3,
+                             code_issues: List[str] = None) -> str:
+        """Recursively attempt to fix code until it works or the deadline passes.
+
+        ``code_issues`` are triage's findings for the current content; a round
+        only succeeds once the static checks pass as well as execution.
+        """
         file_path = file_info[0]
-        
-        for depth in range(max_depth):
-            # Analyze current state
-            analysis = self.analyze_code(file_path, content)
-            result = self.execute_code(file_path)
-            
-            if analysis['ast_valid'] and result is True:
-                print(f"✅ Code fixed after {depth + 1} attempts")
-                return content
+        # Best version seen so far: syntactically valid code beats invalid code,
+        # and on a tie the earlier (less rewritten) version is kept
+        best_content, best_valid = content, None
+
+        try:
+            for depth in range(max_depth):
+                if self._out_of_time():
+                    return self.keep_best(file_path, best_content)
+
+                # Analyze current state; triage's findings stand in for the first round's static checks
+                result = self.execute_code(file_path)
+                analysis = self.analyze_code(file_path, content,
+                                             [issue for issue in code_issues if issue != result]
+                                             if code_issues is not None and depth == 0 else None)
+                clean = analysis['ast_valid'] and not analysis['static_issues']
+
+                if clean and result is True:
+                    print(f"✅ Code fixed after {depth + 1} attempts")
+                    return content
+                if clean and triage.classify_execution_error(
+                        result, self.output_dir, (self.output_dir / file_path).parent) == 'environment':
+                    # The code is fine; rewriting it cannot fix a missing package or interpreter
+                    print(f"🌐 Environment issue, keeping code: {result.strip().splitlines()[-1] if result.strip() else result}")
+                    return content
+                if best_valid is None or (analysis['ast_valid'] and not best_valid):
+                    best_content, best_valid = content, analysis['ast_valid']
+                    
+                print(f"🔄 Correction attempt {depth + 1}/{max_depth}")
+                content = self.correct_error(file_info, result, content, analysis)
                 
-            print(f"🔄 Correction attempt {depth + 1}/{max_depth}")
-            content = self.correct_error(file_info, result, content, analysis)
-            
-            # Write intermediate result
-            self.write_file(file_path, content)
-        
-        # If we reach here, try one final comprehensive fix
-        return self.final_attempt_fix(file_info, content)
+                # Write intermediate result
+                self.write_file(file_path, content)
+
+            if self._out_of_time():
+                return self.keep_best(file_path, best_content)
+            # If we reach here, try one final comprehensive fix
+            return self.final_attempt_fix(file_info, content)
+        except DeadlineExceeded:
+            return self.keep_best(file_path, best_content)
+
+    def keep_best(self, file_path: str, content: str) -> str:
+        """Stop correcting a file because the budget ran out, restoring its best version"""
+        print(f"⏱️ Debugging budget exhausted, keeping best version of: {file_path}")
+        self.truncated = True
+        self.write_file(file_path, content)
+        return content
+
+    def _out_of_time(self) -> bool:
+        return self.deadline is not None and self.deadline.expired()
 
     def final_attempt_fix(self, file_info: Tuple, content: str) -> str:
         """Last resort fix attempt with simplified code"""
@@ -147,12 +281,32 @@ Return 100% working code """
         response = self.llm.invoke(messages)
         return cleaning.remove_template_text(response.content)
 
+    def triage_files(self, agents_task: List[Tuple[str, str, List[str], List[str]]]) -> Dict[str, Dict]:
+        """Run the cheap static checks (and one execution) on every file in parallel"""
+        print("\n🩺 Triaging generated files...")
+        timeout = self.deadline.timeout(self.exec_timeout) if self.deadline else self.exec_timeout
+        verdicts = triage.triage_files(self.output_dir, [file_info[0] for file_info in agents_task],
+                                       self.language(), self.build_cache, timeout)
+        for file_path, verdict in verdicts.items():
+            icon = {'ok': '✅', 'environment': '🌐', 'code': '🐛'}[verdict['status']]
+            print(f"{icon} {file_path}: {verdict['status']}")
+            for issue in verdict['code_issues'] + verdict['environment_issues']:
+                print(f"   - {issue.strip().splitlines()[-1] if issue.strip() else issue}")
+        return verdicts
+
     def debugging_files(self, agents_task: List[Tuple[str, str, List[str], List[str]]]):
-        """Improved file debugging process"""
+        """Improved file debugging process: only files with code defects reach the LLM"""
         print("\nStarting comprehensive code correction...")
+        verdicts = self.triage_files(agents_task)
         
         for file_info in agents_task:
             file_path = file_info[0]
+            if verdicts[file_path]['status'] != 'code':
+                continue
+            if self._out_of_time():
+                print(f"⏱️ Debugging budget exhausted, leaving as generated: {file_path}")
+                self.truncated = True
+                continue
             print(f"\n🔍 Analyzing: {file_path}")
             
             try:
@@ -162,11 +316,15 @@ Return 100% working code """
                     continue
 
                 # Try recursive correction
-                corrected_code = self.recursive_correction(file_info, current_code)
+                corrected_code = self.recursive_correction(file_info, current_code,
+                                                           code_issues=verdicts[file_path]['code_issues'])
                 self.write_file(file_path, corrected_code)
                 print(f"✨ Successfully corrected: {file_path}")
                 
             except Exception as e:
+                if self._out_of_time():
+                    self.truncated = True
+                    continue
                 print(f"⚠️ Error during correction: {str(e)}, attempting final fix...")
                 try:
                     # Always try final attempt fix if anything fails
@@ -192,12 +350,17 @@ Return 100% working code """
         full_path.write_text(content, encoding='utf-8')
         print(f"Generated: {file_path}")
 
+    def language(self) -> str:
+        """Project language from the blueprint, resolved once"""
+        if self.language_info is None:
+            self.language_info = get_language.main(self.blueprint_path)
+        return self.language_info['language']
+
     def execute_code(self, file_path: str):
-        """Execute the code and return True if successful, or the error message if not"""
-        full_path = self.output_dir / file_path
-        language_info = get_language.main()
-        language = language_info['language']
-        result = subprocess.run([language, full_path], capture_output=True, text=True)
-        if result.returncode == 0:
-            return True
-        return result.stderr
+        """Execute the code and return True if successful, or the error message if not.
+
+        Compiled languages are built through the toolchain layer, which only
+        recompiles units whose sources changed since the previous round.
+        """
+        timeout = self.deadline.timeout(self.exec_timeout) if self.deadline else self.exec_timeout
+        return self.build_cache.execute(self.output_dir, file_path, self.language(), timeout)
@@ -1,12 +1,16 @@
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import os
+import threading
 from langchain_core.messages import SystemMessage, HumanMessage
 from datetime import datetime
+from deadline import Deadline, DeadlineExceeded
 
 
 class DeveloperAgent:
-    def __init__(self, llm, output_dir: str = "generated_files"):
+    def __init__(self, llm, output_dir: str = "generated_files", max_memory: Optional[int] = None):
         self.llm = llm
         self.output_dir = Path(output_dir)
         self.system_prompt = """You are an expert software developer.
@@ -18,7 +22,10 @@ Create production-ready code that:
 5. Is well-documented and maintainable
 Generate clean, efficient, and well-structured code."""
 
-        self.memory =[]
+        # Bounded when max_memory is set so long-running workers don't grow without limit
+        self.memory = deque(maxlen=max_memory)
+        self.memory_lock = threading.Lock()  # Files may be generated concurrently
+        self.truncated = False
 
     def read_file(self, file_path: str) -> str:
         """Read existing file content if it exists"""
@@ -55,7 +62,8 @@ Generate clean, efficient, and well-structured code."""
         context_str = "\nProject Context:"
         if self.memory:
             # Get last 3 generated files for immediate context
-            recent_context = self.memory[-3:]
+            with self.memory_lock:
+                recent_context = list(self.memory)[-3:]
             context_str += "\nRecent Generated Files:\n"
             for code in recent_context:
                 context_str += f"\n{code}\n---\n"
@@ -96,13 +104,14 @@ Generate clean, efficient, and well-structured code."""
             generated_code = response.content
 
             # Store in memory with metadata
-            self.memory.append({
-                'file': file_path,
-                'code': generated_code,
-                'dependencies': dependencies,
-                'functions': key_functions,
-                'timestamp': datetime.now().isoformat()
-            })
+            with self.memory_lock:
+                self.memory.append({
+                    'file': file_path,
+                    'code': generated_code,
+                    'dependencies': dependencies,
+                    'functions': key_functions,
+                    'timestamp': datetime.now().isoformat()
+                })
 
             return generated_code
         except Exception as e:
@@ -111,20 +120,41 @@ Generate clean, efficient, and well-structured code."""
         
 
 
-    def process_files(self, agents_task: List[Tuple[str, str, List[str], List[str]]]):
-        """Process all files in the agents task"""
+    def process_files(self, agents_task: List[Tuple[str, str, List[str], List[str]]],
+                      deadline: Optional[Deadline] = None, max_workers: int = 1):
+        """Process all files in the agents task, stopping cleanly when the deadline passes.
+
+        With max_workers > 1 files are generated concurrently, which keeps
+        generation time manageable for projects with dozens of files.
+        """
         print("\nStarting code generation...")
         
-        for file_info in agents_task:
-            file_path = file_info[0]
-            print(f"\nProcessing: {file_path}")
-            
-            try:
-                # Remove the extra argument agents_task[3]
-                code = self.generate_code(file_info)
-                self.write_file(file_path, code)
-            except Exception as e:
-                print(f"Error processing {file_path}: {str(e)}")
-                continue
-
-        print("\nCode generation completed.")
\ No newline at end of file
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                list(pool.map(lambda file_info: self.process_file(file_info, deadline), agents_task))
+        else:
+            for file_info in agents_task:
+                self.process_file(file_info, deadline)
+
+        print("\nCode generation completed.")
+
+    def process_file(self, file_info: Tuple[str, str, List[str], List[str]],
+                     deadline: Optional[Deadline] = None):
+        """Generate and write a single file"""
+        file_path = file_info[0]
+        if deadline is not None and deadline.expired():
+            # Remaining files keep their blueprint skeleton
+            print(f"⏱️ Generation budget exhausted, skipping: {file_path}")
+            self.truncated = True
+            return
+        print(f"\nProcessing: {file_path}")
+        
+        try:
+            # Remove the extra argument agents_task[3]
+            code = self.generate_code(file_info)
+            self.write_file(file_path, code)
+        except DeadlineExceeded:
+            print(f"⏱️ Generation budget exhausted while processing: {file_path}")
+            self.truncated = True
+        except Exception as e:
+            print(f"Error processing {file_path}: {str(e)}")
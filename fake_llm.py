@@ -0,0 +1,179 @@
+import json
+import time
+import random
+import threading
+from typing import Callable, Optional
+
+try:
+    from langchain_core.messages import AIMessage, AIMessageChunk
+except ImportError:
+    AIMessage = AIMessageChunk = None
+
+
+class FakeProviderError(Exception):
+    """Injected provider failure"""
+
+
+class FakeRateLimitError(FakeProviderError):
+    """Request rejected because the simulated provider's rate limit was hit"""
+
+
+class _Message:
+    """Minimal stand-in for AIMessage when langchain is not installed"""
+
+    def __init__(self, content: str, usage_metadata: dict):
+        self.content = content
+        self.usage_metadata = usage_metadata
+        self.response_metadata = {}
+
+
+# Latency distributions: each returns a sampler taking a random.Random
+def constant(seconds: float) -> Callable[[random.Random], float]:
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Callable[[random.Random], float]:
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5) -> Callable[[random.Random], float]:
+    return lambda rng: median * rng.lognormvariate(0, sigma)
+
+
+def bimodal(fast: float, slow: float, slow_fraction: float = 0.05) -> Callable[[random.Random], float]:
+    """Mostly ``fast`` responses with a ``slow_fraction`` tail of stragglers"""
+    return lambda rng: slow if rng.random() < slow_fraction else fast
+
+
+def simulated_response(files: int = 4, defect_rate: float = 0.0, seed: int = None) -> Callable[[list], str]:
+    """Responses that drive the whole pipeline: a blueprint for the PM, code for the agents.
+
+    ``defect_rate`` of generated files contain a syntax error, so the
+    debugging stage gets exercised too.
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def respond(messages) -> str:
+        prompt = '\n'.join(str(getattr(message, 'content', message)) for message in messages)
+        if 'technical project manager' in prompt:
+            blueprint = {
+                'service_name': 'loadtest_app',
+                'files': {
+                    ('main.py' if index == 0 else f'module_{index}.py'): {
+                        'description': f'Simulated component {index}',
+                        'dependencies': [],
+                        'key_functions': ['main()' if index == 0 else f'run_{index}()'],
+                    }
+                    for index in range(files)
+                },
+                'total_files': files,
+                'technologies': {'language': 'Python', 'framework': 'None', 'database': 'None', 'tools': []},
+            }
+            # Braces in the reasoning and trailing prose, as reasoning models produce
+            return (f"<think>Planning the layout: {{main}} plus one module per feature</think>\n"
+                    f"{json.dumps(blueprint)}\n\nEach module exposes a single run function, "
+                    f"so the entry point stays small and the modules can be tested in isolation.")
+        if 'unified diff' in prompt:
+            # Force the whole-file fallback path
+            return 'No diff available.'
+        with lock:
+            broken = rng.random() < defect_rate
+        if broken:
+            return "```python\ndef run(:\n    pass\n```"
+        return ("```python\ndef run():\n    return 'ok'\n\n\n"
+                "if __name__ == '__main__':\n    print(run())\n```")
+
+    return respond
+
+
+class FakeChatModel:
+    """Local chat model with injected latency and errors, for exercising the pipeline offline.
+
+    ``max_concurrency`` caps requests in flight (extra requests queue), and
+    ``requests_per_second`` rejects requests above the rate with
+    FakeRateLimitError, like a provider's 429. ``stream`` spreads the latency
+    over ``chunk_size``-character chunks.
+    """
+
+    def __init__(self, latency: Callable[[random.Random], float] = constant(0.0),
+                 error_rate: float = 0.0, response: Optional[Callable[[list], str]] = None,
+                 output_tokens: int = 200, seed: int = None,
+                 max_concurrency: Optional[int] = None, requests_per_second: Optional[float] = None,
+                 chunk_size: int = 32):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.response = response or (lambda messages: "```python\nprint('ok')\n```")
+        self.output_tokens = output_tokens
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self.requests_per_second = requests_per_second
+        self.chunk_size = chunk_size
+        self.tokens = requests_per_second or 0.0
+        self.refilled_at = time.monotonic()
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.chunks_sent = 0
+
+    def _take_rate_token(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.requests_per_second,
+                          self.tokens + (now - self.refilled_at) * self.requests_per_second)
+        self.refilled_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def _admit(self):
+        """Count the call, apply the rate limit and draw its latency and outcome"""
+        with self.lock:
+            self.calls += 1
+            if self.requests_per_second and not self._take_rate_token():
+                self.rate_limited += 1
+                raise FakeRateLimitError("rate limit exceeded")
+            delay = self.latency(self.rng)
+            fail = self.rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def invoke(self, messages, **kwargs):
+        delay, fail = self._admit()
+        if self.slots:
+            with self.slots:
+                time.sleep(delay)
+        else:
+            time.sleep(delay)
+        if fail:
+            raise FakeProviderError("injected provider error")
+        content = self.response(messages)
+        usage = {'input_tokens': 0, 'output_tokens': self.output_tokens,
+                 'total_tokens': self.output_tokens}
+        if AIMessage is not None:
+            return AIMessage(content=content, usage_metadata=usage)
+        return _Message(content, usage)
+
+    def stream(self, messages, **kwargs):
+        delay, fail = self._admit()
+        if fail:
+            time.sleep(delay)
+            raise FakeProviderError("injected provider error")
+        content = self.response(messages)
+        pieces = [content[i:i + self.chunk_size] for i in range(0, len(content), self.chunk_size)] or ['']
+        if self.slots:
+            self.slots.acquire()
+        try:
+            for piece in pieces:
+                time.sleep(delay / len(pieces))
+                with self.lock:
+                    self.chunks_sent += 1
+                if AIMessageChunk is not None:
+                    yield AIMessageChunk(content=piece)
+                else:
+                    yield _Message(piece, {})
+        finally:
+            if self.slots:
+                self.slots.release()
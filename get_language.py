@@ -35,8 +35,8 @@ def extract_language_info(json_file_path: str) -> Dict[str, Union[str, List[str]
         'total_files': data.get('total_files', 0)
     }
     
-def main():
-    file_path = get_latest_blueprint()
+def main(blueprint_path=None):
+    file_path = blueprint_path or get_latest_blueprint()
     language_info = extract_language_info(file_path)
     return language_info
 
@@ -0,0 +1,188 @@
+import os
+import csv
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import fake_llm
+from resilience import ResilientLLM, percentile
+
+# Imported for its run_pipeline; the ChatGroq client it builds is never called here
+import main
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        # ru_maxrss is a peak, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def open_fds() -> int:
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        return -1
+
+
+class ResourceSampler:
+    """Background thread recording peak RSS and open file descriptors"""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_fds = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+
+    def _sample(self):
+        while not self.stopped.is_set():
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+            self.peak_fds = max(self.peak_fds, open_fds())
+            self.stopped.wait(self.interval)
+
+
+def build_provider(args) -> fake_llm.FakeChatModel:
+    """Simulated chat model configured from the command line"""
+    return fake_llm.FakeChatModel(
+        latency=fake_llm.lognormal(args.latency, args.latency_sigma),
+        error_rate=args.error_rate,
+        response=fake_llm.simulated_response(args.files, args.defect_rate, args.seed),
+        output_tokens=args.output_tokens,
+        seed=args.seed,
+        max_concurrency=args.provider_concurrency,
+        requests_per_second=args.provider_rps,
+    )
+
+
+def run_level(concurrency: int, args, workspace_root: Path) -> Dict:
+    """Run ``concurrency * args.runs_per_worker`` pipelines with ``concurrency`` in flight"""
+    provider = build_provider(args)
+    model = ResilientLLM(provider, max_workers=max(32, concurrency * 2))
+    total_runs = concurrency * args.runs_per_worker
+    latencies, outcomes, memories = [], [], []
+    lock = threading.Lock()
+
+    def one_run(index: int):
+        started = time.perf_counter()
+        try:
+            result = main.run_pipeline(
+                f"Simulated request {index}",
+                workspace=workspace_root / f"c{concurrency}-{index}",
+                model=model,
+                max_memory=args.max_memory,
+                deadline_seconds=args.deadline,
+            )
+            status = result['status']
+            memory = result.get('developer_memory', 0)
+        except Exception:
+            status, memory = 'error', 0
+        with lock:
+            latencies.append(time.perf_counter() - started)
+            outcomes.append(status)
+            memories.append(memory)
+
+    cpu_before = os.times()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, ResourceSampler() as sampler, contextlib.redirect_stdout(devnull):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one_run, range(total_runs)))
+    elapsed = time.perf_counter() - started
+    cpu_after = os.times()
+
+    stages = model.metrics()['stages']
+    return {
+        'concurrency': concurrency,
+        'runs': total_runs,
+        'completed': outcomes.count('completed'),
+        'failed': total_runs - outcomes.count('completed'),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total_runs / elapsed, 4) if elapsed else 0.0,
+        'latency_p50_s': round(percentile(latencies, 50), 3),
+        'latency_p95_s': round(percentile(latencies, 95), 3),
+        'latency_p99_s': round(percentile(latencies, 99), 3),
+        'cpu_user_s': round(cpu_after.user - cpu_before.user, 3),
+        'cpu_system_s': round(cpu_after.system - cpu_before.system, 3),
+        'cpu_children_s': round((cpu_after.children_user + cpu_after.children_system)
+                                - (cpu_before.children_user + cpu_before.children_system), 3),
+        'rss_start_mb': round(rss_before / 2 ** 20, 1),
+        'rss_peak_mb': round(sampler.peak_rss / 2 ** 20, 1),
+        'fds_peak': sampler.peak_fds,
+        'developer_memory_max': max(memories or [0]),
+        'llm_calls': provider.calls,
+        'llm_errors': provider.errors,
+        'llm_rate_limited': provider.rate_limited,
+        'hedges': sum(stage.get('hedges', 0) for stage in stages.values()),
+    }
+
+
+def write_results(rows: List[Dict], output: str):
+    """Write the scaling curve as <output>.csv and <output>.json"""
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{output}.json", 'w') as f:
+        json.dump(rows, f, indent=2)
+    with open(f"{output}.csv", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Sweep pipeline concurrency against a simulated provider")
+    parser.add_argument("--levels", default="1,8,32,128", help="Comma-separated concurrency levels")
+    parser.add_argument("--runs-per-worker", type=int, default=2)
+    parser.add_argument("--files", type=int, default=4, help="Files per simulated blueprint")
+    parser.add_argument("--latency", type=float, default=0.5, help="Median provider latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--defect-rate", type=float, default=0.1, help="Share of generated files with a syntax error")
+    parser.add_argument("--output-tokens", type=int, default=400)
+    parser.add_argument("--provider-concurrency", type=int, help="Max requests the provider serves at once")
+    parser.add_argument("--provider-rps", type=float, help="Provider rate limit in requests per second")
+    parser.add_argument("--max-memory", type=int, default=20)
+    parser.add_argument("--deadline", type=float, default=None, help="Per-request deadline in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="loadtest_results/scaling")
+    parser.add_argument("--keep-workspaces", action="store_true")
+    args = parser.parse_args()
+
+    workspace_root = Path(tempfile.mkdtemp(prefix="loadtest-"))
+    rows = []
+    try:
+        for level in [int(level) for level in args.levels.split(',')]:
+            row = run_level(level, args, workspace_root)
+            rows.append(row)
+            print(f"concurrency={row['concurrency']:>4} throughput={row['throughput_rps']:.3f}/s "
+                  f"p50={row['latency_p50_s']:.2f}s p99={row['latency_p99_s']:.2f}s "
+                  f"rss_peak={row['rss_peak_mb']}MB fds_peak={row['fds_peak']} "
+                  f"failed={row['failed']}/{row['runs']}", file=sys.stderr)
+    finally:
+        if not args.keep_workspaces:
+            shutil.rmtree(workspace_root, ignore_errors=True)
+    write_results(rows, args.output)
+    print(f"Results written to {args.output}.csv and {args.output}.json", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -1,5 +1,6 @@
 import os
 import json
+from pathlib import Path
 from dotenv import load_dotenv
 from typing import TypedDict, Annotated, List
 from langgraph.graph import StateGraph, START, END
@@ -13,6 +14,11 @@ import developper_agents
 import time
 import cleaning 
 import debugger
+from deadline import Deadline, DeadlineExceeded, DeadlineLLM
+from registry import RunRegistry
+from resilience import ResilientLLM, for_stage
+from planner import HierarchicalPlanner
+import blueprint_parser
 
 
 
@@ -35,7 +41,7 @@ builder = StateGraph(GraphState)
 
 # Create the LLM
 # Put you groq Api key here 
-os.environ["GROQ_API_KEY"] = 
+os.environ["GROQ_API_KEY"] = os.environ.get("GROQ_API_KEY", "")
 llm = ChatGroq(
     model="deepseek-r1-distill-llama-70b",  # High-quality code generation model
     temperature=0.1,                         # Slight randomness for creativity
@@ -43,15 +49,24 @@ llm = ChatGroq(
     max_retries=3,                          # More retries for reliability                         # Enable streaming for long responses
 )
 
-def create_node(state, system_prompt):
+# Shared by every run: per-stage latency tracking, hedged requests and circuit breaking
+resilient_llm = ResilientLLM(llm)
+
+def create_node(state, system_prompt, config=None, parse_blueprint=False):
+    # The model can be overridden per invocation (service jobs, load tests)
+    model = ((config or {}).get("configurable") or {}).get("llm") or llm
     human_messages = [msg for msg in state["messages"] if isinstance(msg, HumanMessage)]
     ai_messages = [msg for msg in state["messages"] if isinstance(msg, AIMessage)]
     system_message = [SystemMessage(content=system_prompt)]
     messages = system_message + human_messages + ai_messages
-    message = llm.invoke(messages)
+    if parse_blueprint:
+        # Stream the reply and stop as soon as a complete, valid blueprint has arrived
+        blueprint, raw = blueprint_parser.request_blueprint(model, messages)
+        return {"messages": [AIMessage(content=json.dumps(blueprint, indent=2) if blueprint else raw)]}
+    message = model.invoke(messages)
     return {"messages": [message]}
 
-pm_agent = lambda state: create_node(state, """
+pm_agent = lambda state, config: create_node(state, """
 You are a technical project manager specializing in minimal, efficient software architectures. 
 For any given application request, generate a JSON structure focusing on essential files only.
 Always include the appropriate main/entry point file for the specified language.
@@ -129,7 +144,7 @@ Include for each language:
 3. Configuration (if needed)
 4. Utility functions (if needed)
 5. Dependencies list (package.json, requirements.txt, pom.xml, etc.)
-""")
+""", config, parse_blueprint=True)
 
 
 
@@ -151,21 +166,16 @@ except Exception:
     pass
 
 def clean_json_string(content):
-    """Clean and extract JSON from the response string."""
-    try:
-        # Find the first '{' and last '}'
-        start = content.find('{')
-        end = content.rfind('}') + 1
-        if start != -1 and end != 0:
-            json_str = content[start:end]
-            # Parse to validate and format
-            return json.loads(json_str)
-        return None
-    except Exception as e:
-        print(f"Error cleaning JSON: {e}")
+    """Extract the blueprint JSON from the response string, skipping reasoning blocks."""
+    parser = blueprint_parser.StreamingBlueprintParser()
+    parser.feed(content)
+    blueprint = parser.finish()
+    if blueprint is None:
+        print(f"Error cleaning JSON: {'; '.join(parser.errors)}")
         return None
+    return blueprint_parser.normalize_blueprint(blueprint)
 
-def save_json_output(content, service_name=None):
+def save_json_output(content, service_name=None, output_dir='outputs', run_id=None):
     try:
         # First try to clean and parse the JSON
         json_data = clean_json_string(content)
@@ -178,10 +188,12 @@ def save_json_output(content, service_name=None):
             service_name = json_data.get('service_name', 'microservice')
         
         # Create outputs directory if it doesn't exist
-        os.makedirs('outputs', exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
         
-        # Save JSON file
-        filename = f'outputs/{service_name}_blueprint.json'
+        # Save JSON file; the run ID keeps runs with the same service name apart.
+        # The path is absolute since the registry outlives this working directory
+        suffix = f'_{run_id}' if run_id else ''
+        filename = os.path.abspath(os.path.join(output_dir, f'{service_name}{suffix}_blueprint.json'))
         with open(filename, 'w') as f:
             json.dump(json_data, f, indent=2)
         return filename
@@ -190,34 +202,149 @@ def save_json_output(content, service_name=None):
         print("Raw response:", content)
         return None
 
+def read_service_name(blueprint_path):
+    """Service name recorded in a saved blueprint"""
+    with open(blueprint_path, 'r') as f:
+        return json.load(f).get('service_name')
+
+# Share of the request budget each stage may use; time a stage leaves unused
+# rolls over to the stages after it.
+STAGE_BUDGETS = [('pm', 0.2), ('generation', 0.4), ('debugging', 0.4)]
+
+# Default end-to-end budget per request, overridable through the environment
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", 900))
+
+def stage_deadline(deadline, stage):
+    """Carve the budget for ``stage`` out of what is left of the request deadline"""
+    names = [name for name, _ in STAGE_BUDGETS]
+    remaining_weights = [weight for _, weight in STAGE_BUDGETS[names.index(stage):]]
+    return deadline.child(remaining_weights[0] / sum(remaining_weights), stage)
+
+# "flat" plans in one PM call; "hierarchical" plans modules first, then each module concurrently
+PLANNING_MODE = os.environ.get("PLANNING_MODE", "flat")
+
+# Files generated concurrently for each planning mode; hierarchical blueprints are
+# large and their modules only meet through the planned interfaces
+GENERATION_WORKERS = {
+    'flat': 1,
+    'hierarchical': int(os.environ.get("HIERARCHICAL_GENERATION_WORKERS", 4)),
+}
+
+def run_pipeline(user_input, workspace=None, model=None, max_memory=None, deadline_seconds=None,
+                 registry=None, planning=None, generation_workers=None):
+    """Run planning, generation, cleaning and debugging for a single request.
+
+    All blueprints and generated files live under ``workspace`` (the current
+    directory by default) so concurrent jobs never see each other's output.
+    The run is recorded in ``registry`` (``outputs/runs.db`` of the workspace
+    by default). Returns a summary dict with the run ID, status, blueprint
+    path, files, timings and the stages that were cut short by the
+    ``deadline_seconds`` budget. ``planning`` selects flat or hierarchical
+    planning; ``generation_workers`` generates that many files concurrently
+    (by default the GENERATION_WORKERS entry for the planning mode).
+    """
+    planning = planning or PLANNING_MODE
+    generation_workers = generation_workers or GENERATION_WORKERS.get(planning, 1)
+    base_dir = Path(workspace) if workspace else Path('.')
+    registry = registry or RunRegistry(base_dir / 'outputs' / 'runs.db')
+    run_id = registry.create_run(prompt=user_input, workspace=str(base_dir.resolve()))
+    try:
+        result = _run_stages(user_input, base_dir, run_id, registry, model or resilient_llm, max_memory,
+                             Deadline(deadline_seconds, stage='request'), planning,
+                             generation_workers)
+    except Exception:
+        registry.update(run_id, status='failed')
+        raise
+    registry.update(run_id, status=result['status'], timings=result['timings'])
+    return {'run_id': run_id, **result}
+
+def _run_stages(user_input, base_dir, run_id, registry, model, max_memory, deadline, planning,
+                generation_workers):
+    outputs_dir = base_dir / 'outputs'
+    generated_dir = base_dir / 'generated_files'
+    timings = {}
+    truncated = []
+
+    registry.update(run_id, status='planning')
+    started = time.perf_counter()
+    pm_deadline = stage_deadline(deadline, 'pm')
+    pm_llm = DeadlineLLM(for_stage(model, 'pm'), pm_deadline)
+    try:
+        if planning == 'hierarchical':
+            blueprint = HierarchicalPlanner(pm_llm).plan(user_input)
+            pm_response = json.dumps(blueprint, indent=2)
+        else:
+            response = graph.invoke(
+                {"messages": [HumanMessage(content=user_input)]},
+                config={"configurable": {"llm": pm_llm}},
+            )
+            pm_response = response["messages"][-1].content
+    except DeadlineExceeded:
+        print("\n⏱️ Planning budget exhausted before a blueprint was produced.")
+        truncated.append('pm')
+        pm_response = ""
+    except ValueError as e:
+        print(f"\nPlanning failed: {e}")
+        pm_response = ""
+    timings['pm'] = time.perf_counter() - started
+    print("\nAnalyst Response:", pm_response)
+
+    # Save the JSON output
+    saved_file = save_json_output(pm_response, output_dir=outputs_dir, run_id=run_id) if pm_response else None
+    if not saved_file:
+        print("\nFailed to save blueprint. Please check the response format.")
+        return {'status': 'failed', 'blueprint': None, 'files': [], 'timings': timings,
+                'truncated': truncated}
+    print(f"\nBlueprint saved to: {saved_file}")
+    registry.update(run_id, status='generating', blueprint_path=saved_file,
+                    service_name=read_service_name(saved_file), timings=timings)
+
+    create_files.main(saved_file, base_dir=generated_dir)
+    agents_task = agents_tasks.main(saved_file)
+    print("number of files: ", len(agents_task))
+
+    # Initialize developer agent and generate code
+    started = time.perf_counter()
+    generation_deadline = stage_deadline(deadline, 'generation')
+    generation_llm = DeadlineLLM(for_stage(model, 'generation'), generation_deadline)
+    developer = developper_agents.DeveloperAgent(generation_llm, output_dir=generated_dir, max_memory=max_memory)
+    developer.process_files(agents_task, deadline=generation_deadline, max_workers=generation_workers)
+    print("\nCode generation completed.")
+    cleaning.main(generated_dir, agents_task)
+    timings['generation'] = time.perf_counter() - started
+    if developer.truncated:
+        truncated.append('generation')
+
+    # Initialize debugger agent and correct code
+    registry.update(run_id, status='debugging', timings=timings)
+    started = time.perf_counter()
+    debugging_deadline = stage_deadline(deadline, 'debugging')
+    debugging_llm = DeadlineLLM(for_stage(model, 'debugging'), debugging_deadline)
+    debug_agent = debugger.DebuggerAgent(debugging_llm, output_dir=generated_dir,
+                                         blueprint_path=saved_file, deadline=debugging_deadline)
+    debug_agent.debugging_files(agents_task)
+    print("\nCode correction completed.")
+    timings['debugging'] = time.perf_counter() - started
+    if debug_agent.truncated:
+        truncated.append('debugging')
+    if truncated:
+        print(f"\n⏱️ Stages truncated by the deadline: {', '.join(truncated)}")
+
+    return {
+        'status': 'completed',
+        'blueprint': str(saved_file),
+        'files': [file_info[0] for file_info in agents_task],
+        'timings': timings,
+        'truncated': truncated,
+        'developer_memory': len(developer.memory),
+    }
+
 def main_loop():
     try:
         user_input = input(">> ")
-        response = graph.invoke({"messages": [HumanMessage(content=user_input)]})
-        pm_response = response["messages"][-1].content
-        print("\nAnalyst Response:", pm_response)
-        
-        # Save the JSON output
-        saved_file = save_json_output(pm_response)
-        if saved_file:
-            print(f"\nBlueprint saved to: {saved_file}")
-        else:
-            print("\nFailed to save blueprint. Please check the response format.")
-        
-        create_files.main()
-        agents_task = agents_tasks.main()
-        print("number of files: ", len(agents_task))
-        
-        # Initialize developer agent and generate code
-        developer = developper_agents.DeveloperAgent(llm)
-        developer.process_files(agents_task)
-        print("\nCode generation completed.")
-        cleaning.main()
-
-        # Initialize debugger agent and correct code
-        debug_agent = debugger.DebuggerAgent(llm)
-        debug_agent.debugging_files(agents_task)
-        print("\nCode correction completed.")
+        result = run_pipeline(user_input, deadline_seconds=REQUEST_DEADLINE_SECONDS)
+        if result['status'] != 'completed':
+            return False
         
     except Exception as e:
         print(f"Error in main loop: {str(e)}")
@@ -0,0 +1,136 @@
+import re
+from typing import List, Optional, Tuple
+
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+class PatchError(Exception):
+    """Raised when a diff cannot be applied to the current file content"""
+
+
+def locate_error_lines(file_path: str, error, syntax_errors: List[str]) -> List[int]:
+    """Find the line numbers an error report points at for this file"""
+    lines = []
+    for message in syntax_errors:
+        match = re.search(r'line (\d+)', message, flags=re.IGNORECASE)
+        if match:
+            lines.append(int(match.group(1)))
+
+    if isinstance(error, str):
+        file_name = file_path.replace('\\', '/').split('/')[-1]
+        # Python tracebacks: File ".../name.py", line N
+        for match in re.finditer(r'File "([^"]+)", line (\d+)', error):
+            if match.group(1).replace('\\', '/').endswith(file_name):
+                lines.append(int(match.group(2)))
+        # Compiler style diagnostics: name.ext:N: or name.ext:N:M:
+        for match in re.finditer(re.escape(file_name) + r':(\d+)', error):
+            lines.append(int(match.group(1)))
+
+    return sorted(set(lines))
+
+
+def extract_region(content: str, error_lines: List[int], context: int = 20) -> Tuple[int, int, str]:
+    """Return (first_line, last_line, text) of the region around the error lines.
+
+    Line numbers are 1-based and inclusive. Without error lines the whole file
+    is returned.
+    """
+    lines = content.splitlines()
+    if not error_lines:
+        return 1, len(lines), content
+    start = max(1, min(error_lines) - context)
+    end = min(len(lines), max(error_lines) + context)
+    return start, end, '\n'.join(lines[start - 1:end])
+
+
+def number_lines(text: str, start: int) -> str:
+    """Prefix every line with its 1-based line number in the full file ("  12 | code")"""
+    lines = text.splitlines()
+    width = len(str(start + len(lines) - 1))
+    return '\n'.join(f"{number:>{width}} | {line}" for number, line in enumerate(lines, start))
+
+
+def extract_diff(response: str) -> str:
+    """Pull the unified diff out of a model response"""
+    response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
+    fenced = re.search(r'```[a-zA-Z]*\n(.*?)```', response, flags=re.DOTALL)
+    if fenced:
+        response = fenced.group(1)
+    lines = response.splitlines()
+    for index, line in enumerate(lines):
+        if line.startswith('--- ') or line.startswith('@@'):
+            return '\n'.join(lines[index:])
+    return ''
+
+
+def parse_hunks(diff: str) -> List[dict]:
+    """Parse unified diff text into hunks of old/new lines"""
+    hunks = []
+    current = None
+    for line in diff.splitlines():
+        if line.startswith('@@'):
+            match = HUNK_HEADER.match(line)
+            current = {'old_start': int(match.group(1)) if match else None, 'old': [], 'new': []}
+            hunks.append(current)
+        elif current is None:
+            # File headers (--- a/x, +++ b/x) and anything else before the first hunk;
+            # inside a hunk "--- " is a removed "-- " line, e.g. an SQL comment
+            continue
+        elif line.startswith('\\'):
+            # "\ No newline at end of file"
+            continue
+        elif line.startswith('-'):
+            current['old'].append(line[1:])
+        elif line.startswith('+'):
+            current['new'].append(line[1:])
+        else:
+            # Context line; models often drop the leading space on blank lines
+            text = line[1:] if line.startswith(' ') else line
+            current['old'].append(text)
+            current['new'].append(text)
+    return hunks
+
+
+def _find_block(lines: List[str], block: List[str], expected: int, start: int) -> Optional[int]:
+    """Locate ``block`` in ``lines`` at or after ``start``, nearest to ``expected`` first"""
+    wanted = [line.rstrip() for line in block]
+    last = len(lines) - len(block)
+    if last < start:
+        return None
+    expected = min(max(expected, start), last)
+    for offset in range(0, last - start + 1):
+        for position in (expected - offset, expected + offset):
+            if start <= position <= last and \
+                    [line.rstrip() for line in lines[position:position + len(block)]] == wanted:
+                return position
+    return None
+
+
+def apply_unified_diff(content: str, diff: str) -> str:
+    """Apply a unified diff, tolerating shifted line numbers and trailing whitespace"""
+    hunks = parse_hunks(diff)
+    if not hunks:
+        raise PatchError("No hunks found in diff")
+
+    lines = content.splitlines()
+    result = []
+    cursor = 0
+    for hunk in hunks:
+        if hunk['old']:
+            expected = hunk['old_start'] - 1 if hunk['old_start'] else cursor
+            position = _find_block(lines, hunk['old'], expected, cursor)
+            if position is None:
+                raise PatchError(f"Hunk near line {expected + 1} does not match the file")
+        else:
+            # Pure insertion: "@@ -N,0 ..." adds the new lines after old line N
+            expected = hunk['old_start'] if hunk['old_start'] is not None else cursor
+            position = min(max(expected, cursor), len(lines))
+        result.extend(lines[cursor:position])
+        result.extend(hunk['new'])
+        cursor = position + len(hunk['old'])
+    result.extend(lines[cursor:])
+
+    patched = '\n'.join(result)
+    if content.endswith('\n'):
+        patched += '\n'
+    return patched
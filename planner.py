@@ -0,0 +1,206 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from langchain_core.messages import SystemMessage, HumanMessage
+import toolchains
+from blueprint_parser import extract_json
+
+TOP_LEVEL_PROMPT = """You are a software architect planning a large application.
+Split the application into cohesive modules and define the interfaces between them.
+Do NOT list individual files; each module is planned separately later.
+
+Return ONLY this JSON structure:
+{
+ "service_name": "",
+ "technologies": {
+   "language": "programming language to use",
+   "framework": "minimal framework if needed",
+   "database": "lightweight database if required",
+   "tools": ["essential development tools only"]
+ },
+ "entry_point": "main file for the chosen language (main.py, index.js, Main.java, main.cpp, main.go, ...)",
+ "modules": [
+   {
+     "name": "snake_case_module_name",
+     "responsibility": "what this module owns",
+     "provides": [{"name": "function or class signature", "description": "contract"}],
+     "consumes": ["other_module.interface name it calls"]
+   }
+ ]
+}
+
+Requirements:
+1. Every interface a module consumes must be provided by exactly one other module
+2. Keep modules loosely coupled; avoid dependency cycles
+3. Module names must be valid directory names"""
+
+MODULE_PROMPT = """You are a senior developer planning the files of ONE module of a larger application.
+Only plan files inside this module; other modules are planned by other developers.
+
+Return ONLY this JSON structure, with file paths relative to the module directory:
+{
+ "files": {
+   "filename.ext": {
+     "description": "single responsibility of the file",
+     "dependencies": ["libraries and project modules it uses"],
+     "key_functions": ["functions or classes it implements"]
+   }
+ }
+}
+
+Requirements:
+1. Every provided interface must appear in the key_functions of exactly one file
+2. Keep files small and focused (1-6 files per module)
+3. Use the conventions of the project language"""
+
+
+def interface_name(interface) -> str:
+    """Interfaces may come back as {"name": ...} objects or bare strings"""
+    return interface.get('name', '') if isinstance(interface, dict) else str(interface)
+
+
+class HierarchicalPlanner:
+    """Plans large applications as modules first, then each module's files concurrently"""
+
+    def __init__(self, llm, max_workers: int = 8, retries: int = 1):
+        self.llm = llm
+        self.max_workers = max_workers
+        self.retries = retries
+
+    def _ask(self, system_prompt: str, prompt: str) -> Optional[Dict]:
+        for _ in range(self.retries + 1):
+            response = self.llm.invoke([SystemMessage(content=system_prompt), HumanMessage(content=prompt)])
+            parsed = extract_json(response.content)
+            if parsed is not None:
+                return parsed
+        return None
+
+    def plan_modules(self, user_input: str) -> Dict:
+        """Top-level plan: modules, their interfaces and the technologies"""
+        plan = self._ask(TOP_LEVEL_PROMPT, user_input)
+        if not plan or not isinstance(plan.get('modules'), list):
+            raise ValueError("Top-level planner did not return any modules")
+        modules = []
+        for module in plan['modules']:
+            if isinstance(module, dict) and isinstance(module.get('name'), str) and module['name'].strip():
+                modules.append(module)
+            else:
+                print(f"⚠️ Skipping module without a name: {module}")
+        if not modules:
+            raise ValueError("Top-level planner did not return any named modules")
+        plan['modules'] = modules
+        return plan
+
+    def plan_module(self, user_input: str, plan: Dict, module: Dict) -> Dict[str, Dict]:
+        """File list for one module; falls back to a single file if the sub-planner fails"""
+        provided = {other['name']: [interface_name(i) for i in other.get('provides', [])]
+                    for other in plan['modules']}
+        consumed = list(module.get('consumes', []))
+        prompt = f"""Application request: {user_input}
+Language: {plan.get('technologies', {}).get('language', '')}
+Framework: {plan.get('technologies', {}).get('framework', '')}
+
+Module: {module['name']}
+Responsibility: {module.get('responsibility', '')}
+Interfaces this module must provide:
+{json.dumps(module.get('provides', []), indent=2)}
+Interfaces it consumes from other modules:
+{json.dumps(consumed, indent=2)}
+All module interfaces in the application:
+{json.dumps(provided, indent=2)}"""
+
+        result = self._ask(MODULE_PROMPT, prompt)
+        if result and isinstance(result.get('files'), dict) and result['files']:
+            return result['files']
+        print(f"⚠️ Sub-planner failed for module {module['name']}, using a single file")
+        return {
+            f"{module['name']}{self._extension(plan)}": {
+                'description': module.get('responsibility', ''),
+                'dependencies': [],
+                'key_functions': provided.get(module['name'], []),
+            }
+        }
+
+    def plan(self, user_input: str) -> Dict:
+        """Plan the whole application and return a blueprint in the flat PM format"""
+        plan = self.plan_modules(user_input)
+        modules = plan['modules']
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            module_files = list(pool.map(lambda module: self.plan_module(user_input, plan, module), modules))
+        blueprint, issues = self.merge(plan, module_files)
+        for issue in issues:
+            print(f"⚠️ Blueprint contract: {issue}")
+        return blueprint
+
+    def merge(self, plan: Dict, module_files: List[Dict[str, Dict]]) -> Tuple[Dict, List[str]]:
+        """Merge module file lists into one blueprint and reconcile cross-module contracts.
+
+        Returns the blueprint and the contract problems found (and repaired where possible).
+        """
+        issues = []
+        modules = plan['modules']
+        providers = {}
+        for module in modules:
+            for interface in module.get('provides', []):
+                providers.setdefault(interface_name(interface), module['name'])
+
+        files = {}
+        for module, module_plan in zip(modules, module_files):
+            consumed_modules = set()
+            for reference in module.get('consumes', []):
+                # Like provides, consumes entries may come back as {"name": ...} objects
+                reference = interface_name(reference)
+                target = reference.partition('.')[0]
+                if target in {m['name'] for m in modules} and target != module['name']:
+                    consumed_modules.add(target)
+                elif reference in providers:
+                    consumed_modules.add(providers[reference])
+                else:
+                    issues.append(f"{module['name']} consumes '{reference}', which no module provides")
+
+            declared = set()
+            for filename, info in module_plan.items():
+                if not isinstance(info, dict):
+                    info = {'description': str(info)}
+                relative = filename.lstrip('/')
+                if relative.startswith(f"{module['name']}/"):
+                    relative = relative[len(module['name']) + 1:]
+                path = f"{module['name']}/{relative}"
+                if path in files:
+                    issues.append(f"duplicate file {path}")
+                    continue
+                info = {
+                    'description': info.get('description', ''),
+                    'dependencies': list(info.get('dependencies', [])) + sorted(consumed_modules),
+                    'key_functions': list(info.get('key_functions', [])),
+                }
+                declared.update(info['key_functions'])
+                files[path] = info
+
+            # Interfaces the sub-planner forgot are assigned to the module's first file
+            module_paths = [path for path in files if path.startswith(f"{module['name']}/")]
+            for interface in module.get('provides', []):
+                name = interface_name(interface)
+                if module_paths and not any(name.split('(')[0] in declared_name for declared_name in declared):
+                    issues.append(f"{module['name']} did not place interface '{name}' in any file")
+                    files[module_paths[0]]['key_functions'].append(name)
+
+        entry_point = plan.get('entry_point') or f"main{self._extension(plan)}"
+        files[entry_point] = {
+            'description': "Main entry point file that wires the modules together and runs the application",
+            'dependencies': [module['name'] for module in modules],
+            'key_functions': ['main()'],
+        }
+
+        blueprint = {
+            'service_name': plan.get('service_name', 'application'),
+            'files': files,
+            'total_files': len(files),
+            'technologies': plan.get('technologies', {}),
+            'modules': modules,
+        }
+        return blueprint, issues
+
+    def _extension(self, plan: Dict) -> str:
+        language = toolchains.resolve_language(plan.get('technologies', {}).get('language', ''))
+        return toolchains.TOOLCHAINS[language]['extensions'][0] if language else '.py'
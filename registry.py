@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import argparse
+import threading
+from glob import glob
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    service_name TEXT,
+    prompt TEXT,
+    blueprint_path TEXT,
+    workspace TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    timings TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs(created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status, created_at);
+"""
+
+# Registries opened through get_registry, one connection per database file
+_registries: Dict[Path, 'RunRegistry'] = {}
+_registries_lock = threading.Lock()
+
+
+class RunRegistry:
+    """SQLite index of pipeline runs: blueprint, workspace, status and timings per run ID"""
+
+    def __init__(self, db_path: str = "outputs/runs.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            # WAL lets concurrent runs read while another one writes
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+            is_new = self.conn.execute("SELECT 1 FROM runs LIMIT 1").fetchone() is None
+        if is_new:
+            self.migrate_outputs(self.db_path.parent)
+
+    def create_run(self, prompt: str = None, workspace: str = None, run_id: str = None) -> str:
+        """Register a new run and return its ID"""
+        run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, prompt, workspace, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'created', ?, ?)",
+                (run_id, prompt, str(workspace) if workspace else None, now, now),
+            )
+        return run_id
+
+    def update(self, run_id: str, status: str = None, blueprint_path: str = None,
+               service_name: str = None, timings: Dict = None):
+        """Update the given fields of a run"""
+        fields = {'updated_at': time.time()}
+        if status is not None:
+            fields['status'] = status
+        if blueprint_path is not None:
+            fields['blueprint_path'] = str(blueprint_path)
+        if service_name is not None:
+            fields['service_name'] = service_name
+        if timings is not None:
+            fields['timings'] = json.dumps(timings)
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self.lock, self.conn:
+            self.conn.execute(f"UPDATE runs SET {assignments} WHERE run_id = ?",
+                              (*fields.values(), run_id))
+
+    def get(self, run_id: str) -> Optional[Dict]:
+        """Look up a run by ID"""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return self._to_dict(row)
+
+    def latest(self, with_blueprint: bool = True) -> Optional[Dict]:
+        """Most recently created run, by default only among runs that have a blueprint"""
+        query = "SELECT * FROM runs"
+        if with_blueprint:
+            query += " WHERE blueprint_path IS NOT NULL"
+        with self.lock:
+            row = self.conn.execute(query + " ORDER BY created_at DESC LIMIT 1").fetchone()
+        return self._to_dict(row)
+
+    def list_runs(self, limit: int = 50, status: str = None) -> List[Dict]:
+        """Newest runs first, optionally filtered by status"""
+        query, params = "SELECT * FROM runs", []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def prune(self, keep: int = 100, remove_files: bool = True) -> int:
+        """Delete all but the ``keep`` newest runs; returns the number removed"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM runs ORDER BY created_at DESC LIMIT -1 OFFSET ?", (keep,)
+            ).fetchall()
+        if remove_files:
+            cwd = Path.cwd().resolve()
+            db_path = self.db_path.resolve()
+            for row in rows:
+                if row['blueprint_path'] and os.path.exists(row['blueprint_path']):
+                    os.remove(row['blueprint_path'])
+                # Only per-run workspaces are removed, never the shared working directory
+                # or a workspace holding this registry (CLI runs record their directory)
+                workspace = Path(row['workspace']).resolve() if row['workspace'] else None
+                if workspace and workspace != cwd and workspace not in cwd.parents \
+                        and workspace not in db_path.parents and workspace.is_dir():
+                    shutil.rmtree(workspace, ignore_errors=True)
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM runs WHERE run_id = ?", [(row['run_id'],) for row in rows])
+        return len(rows)
+
+    def migrate_outputs(self, output_dir: str = "outputs") -> int:
+        """Import blueprints written before the registry existed; returns the number imported"""
+        imported = 0
+        for path in glob(str(Path(output_dir) / '*_blueprint.json')):
+            created_at = os.path.getmtime(path)
+            try:
+                with open(path, 'r') as f:
+                    service_name = json.load(f).get('service_name')
+            except (OSError, ValueError):
+                service_name = None
+            run_id = f"legacy-{Path(path).name[:-len('_blueprint.json')]}"
+            resolved = str(Path(path).resolve())
+            with self.lock, self.conn:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO runs (run_id, service_name, blueprint_path, status, "
+                    "created_at, updated_at) VALUES (?, ?, ?, 'imported', ?, ?)",
+                    (run_id, service_name, resolved, created_at, created_at),
+                )
+                # Earlier migrations stored the path relative to the working directory
+                self.conn.execute("UPDATE runs SET blueprint_path = ? WHERE run_id = ? AND blueprint_path = ?",
+                                  (resolved, run_id, str(path)))
+            imported += cursor.rowcount
+        return imported
+
+    def _to_dict(self, row) -> Optional[Dict]:
+        if row is None:
+            return None
+        run = dict(row)
+        run['timings'] = json.loads(run['timings'] or '{}')
+        return run
+
+
+def get_registry(db_path: str = "outputs/runs.db") -> RunRegistry:
+    """Shared registry for ``db_path``, opened (and migrated) once per process"""
+    key = Path(db_path).resolve()
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = RunRegistry(key)
+        return _registries[key]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and maintain the run registry")
+    parser.add_argument("--db", default="outputs/runs.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="List the newest runs")
+    list_parser.add_argument("--limit", type=int, default=20)
+    list_parser.add_argument("--status")
+    show_parser = commands.add_parser("show", help="Show a single run")
+    show_parser.add_argument("run_id")
+    prune_parser = commands.add_parser("prune", help="Delete all but the newest runs")
+    prune_parser.add_argument("--keep", type=int, default=100)
+    migrate_parser = commands.add_parser("migrate", help="Import existing blueprints")
+    migrate_parser.add_argument("--outputs", default="outputs")
+    args = parser.parse_args()
+
+    registry = RunRegistry(args.db)
+    if args.command == "list":
+        for run in registry.list_runs(args.limit, args.status):
+            created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['created_at']))
+            print(f"{run['run_id']}  {created}  {run['status']:<10} {run['service_name'] or '-'}")
+    elif args.command == "show":
+        run = registry.get(args.run_id)
+        print(json.dumps(run, indent=2) if run else f"Run not found: {args.run_id}")
+    elif args.command == "prune":
+        print(f"Removed {registry.prune(args.keep)} runs")
+    elif args.command == "migrate":
+        print(f"Imported {registry.migrate_outputs(args.outputs)} blueprints")
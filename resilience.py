@@ -0,0 +1,290 @@
+import time
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised when the provider's circuit is open and there is nowhere to reroute"""
+
+
+def percentile(values, q: float) -> Optional[float]:
+    """Nearest-rank percentile of a sequence, or None if it is empty"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def output_tokens(message) -> int:
+    """Completion tokens reported by the provider, estimated from the text if missing"""
+    usage = getattr(message, 'usage_metadata', None) or {}
+    if usage.get('output_tokens'):
+        return usage['output_tokens']
+    token_usage = (getattr(message, 'response_metadata', None) or {}).get('token_usage') or {}
+    if token_usage.get('completion_tokens'):
+        return token_usage['completion_tokens']
+    return len(getattr(message, 'content', '') or '') // 4
+
+
+class CircuitBreaker:
+    """Opens when the recent error rate spikes, then lets a probe through after a cooldown"""
+
+    def __init__(self, error_threshold: float = 0.5, window: int = 20, min_calls: int = 10,
+                 cooldown: float = 30.0):
+        self.error_threshold = error_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.outcomes = deque(maxlen=window)
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = 'half_open'
+                return True
+            return self.state == 'closed'
+
+    def record(self, success: bool):
+        with self.lock:
+            if self.state == 'half_open':
+                # The probe decides whether the provider has recovered
+                if success:
+                    self.state = 'closed'
+                    self.outcomes.clear()
+                else:
+                    self.state, self.opened_at = 'open', time.monotonic()
+                return
+            self.outcomes.append(success)
+            failures = self.outcomes.count(False)
+            if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.error_threshold:
+                self.state, self.opened_at = 'open', time.monotonic()
+
+
+class ResilientLLM:
+    """Chat model wrapper adding per-stage latency tracking, hedged requests and circuit breaking.
+
+    Once a stage has ``min_samples`` latencies, a call still running after the
+    stage's ``hedge_percentile`` latency gets a duplicate request, and the
+    first answer wins. When the breaker is open, calls go to ``fallback`` or
+    fail fast with CircuitOpenError.
+    """
+
+    def __init__(self, llm, fallback=None, hedge_percentile: float = 95, min_samples: int = 20,
+                 min_hedge_delay: float = 0.5, window: int = 200, breaker: CircuitBreaker = None,
+                 max_workers: int = 32):
+        self.llm = llm
+        self.fallback = fallback
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.min_hedge_delay = min_hedge_delay
+        self.window = window
+        self.breaker = breaker or CircuitBreaker()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, deque] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def for_stage(self, stage: str) -> 'StageLLM':
+        """View of this model that attributes every call to ``stage``"""
+        return StageLLM(self, stage)
+
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little data"""
+        with self.lock:
+            samples = list(self.latencies.get(stage, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return max(self.min_hedge_delay, percentile(samples, self.hedge_percentile))
+
+    def invoke(self, messages, stage: str = 'default', **kwargs):
+        if not self.breaker.allow():
+            self._count(stage, 'rejected')
+            if self.fallback is not None:
+                self._count(stage, 'rerouted')
+                return self.fallback.invoke(messages, **kwargs)
+            raise CircuitOpenError(f"Circuit open for stage '{stage}'")
+
+        self._count(stage, 'calls')
+        delay = self.hedge_delay(stage)
+        pending = {self.pool.submit(self._timed_call, stage, messages, kwargs)}
+        done, pending = wait(pending, timeout=delay)
+        if not done:
+            self._count(stage, 'hedges')
+            pending.add(self.pool.submit(self._timed_call, stage, messages, kwargs))
+
+        error = None
+        while True:
+            if not done:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            future = done.pop()
+            try:
+                result = future.result()
+            except Exception as e:
+                error = e
+                self.breaker.record(False)
+                self._count(stage, 'errors')
+                if pending or done:
+                    continue
+                raise error
+            self.breaker.record(True)
+            for loser in pending | done:
+                # Tokens spent on the duplicate that lost are counted when it lands
+                loser.add_done_callback(lambda f, stage=stage: self._count_waste(stage, f))
+            return result
+
+    def stream(self, messages, stage: str = 'default', **kwargs):
+        """Streaming call guarded by the breaker and counted in the stage latencies.
+
+        Streams are not hedged: a duplicate cannot take over half-way through.
+        A stream the caller closes early still counts as a success, but its
+        truncated duration is kept out of the latencies that set the hedge
+        threshold and only counted under ``stopped_early``.
+        """
+        if not self.breaker.allow():
+            self._count(stage, 'rejected')
+            if self.fallback is not None:
+                self._count(stage, 'rerouted')
+                yield from _stream_or_invoke(self.fallback, messages, kwargs)
+                return
+            raise CircuitOpenError(f"Circuit open for stage '{stage}'")
+
+        self._count(stage, 'calls')
+        started = time.perf_counter()
+        failed = exhausted = False
+        try:
+            yield from _stream_or_invoke(self.llm, messages, kwargs)
+            exhausted = True
+        except Exception:
+            failed = True
+            self.breaker.record(False)
+            self._count(stage, 'errors')
+            raise
+        finally:
+            if not failed:
+                self.breaker.record(True)
+            if exhausted:
+                with self.lock:
+                    self.latencies.setdefault(stage, deque(maxlen=self.window)).append(
+                        time.perf_counter() - started)
+            elif not failed:
+                self._count(stage, 'stopped_early')
+
+    def metrics(self) -> Dict:
+        """Latency percentiles, hedge rate, wasted tokens and breaker state per stage"""
+        with self.lock:
+            stages = {}
+            for stage in set(self.latencies) | set(self.stats):
+                samples = list(self.latencies.get(stage, ()))
+                stats = dict(self.stats.get(stage, {}))
+                calls = stats.get('calls', 0)
+                stages[stage] = {
+                    **stats,
+                    'p50': percentile(samples, 50),
+                    'p95': percentile(samples, 95),
+                    'p99': percentile(samples, 99),
+                    'hedge_rate': stats.get('hedges', 0) / calls if calls else 0.0,
+                }
+        return {'breaker': self.breaker.state, 'stages': stages}
+
+    def _timed_call(self, stage: str, messages, kwargs):
+        started = time.perf_counter()
+        result = self.llm.invoke(messages, **kwargs)
+        with self.lock:
+            self.latencies.setdefault(stage, deque(maxlen=self.window)).append(time.perf_counter() - started)
+        return result
+
+    def _count(self, stage: str, name: str, amount: int = 1):
+        with self.lock:
+            stats = self.stats.setdefault(stage, {})
+            stats[name] = stats.get(name, 0) + amount
+
+    def _count_waste(self, stage: str, future):
+        if not future.cancelled() and future.exception() is None:
+            self._count(stage, 'wasted_tokens', output_tokens(future.result()))
+
+    def __getattr__(self, name):
+        if name == 'llm':
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+
+class StageLLM:
+    """ResilientLLM bound to one pipeline stage; drop-in for the agents' ``llm``"""
+
+    def __init__(self, resilient: ResilientLLM, stage: str):
+        self.resilient = resilient
+        self.stage = stage
+
+    def invoke(self, messages, **kwargs):
+        return self.resilient.invoke(messages, stage=self.stage, **kwargs)
+
+    def stream(self, messages, **kwargs):
+        return self.resilient.stream(messages, stage=self.stage, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.resilient.llm, name)
+
+
+def _stream_or_invoke(llm, messages, kwargs):
+    """Chunks from ``llm.stream``, or the whole reply as one chunk for models that cannot stream"""
+    if hasattr(llm, 'stream'):
+        yield from llm.stream(messages, **kwargs)
+    else:
+        yield llm.invoke(messages, **kwargs)
+
+
+def for_stage(model, stage: str):
+    """Attribute calls to ``stage`` when the model supports it"""
+    return model.for_stage(stage) if isinstance(model, ResilientLLM) else model
+
+
+def simulate(calls: int = 400, fast: float = 0.02, slow: float = 0.5, slow_fraction: float = 0.05,
+             error_rate: float = 0.0, seed: int = 7) -> Dict:
+    """Compare plain and hedged calls against a fake provider with a straggler tail"""
+    import fake_llm
+
+    results = {}
+    for hedged in (False, True):
+        fake = fake_llm.FakeChatModel(fake_llm.bimodal(fast, slow, slow_fraction),
+                                      error_rate=error_rate, seed=seed)
+        # Without enough samples the wrapper never hedges, which gives the baseline
+        model = ResilientLLM(fake, min_samples=20 if hedged else calls + 1, min_hedge_delay=fast,
+                             hedge_percentile=90)
+        latencies, failures = [], 0
+        for _ in range(calls):
+            started = time.perf_counter()
+            try:
+                model.invoke([], stage='simulated')
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+        stage = model.metrics()['stages']['simulated']
+        results['hedged' if hedged else 'plain'] = {
+            'p50': percentile(latencies, 50),
+            'p99': percentile(latencies, 99),
+            'failures': failures,
+            'hedge_rate': stage['hedge_rate'],
+            'wasted_tokens': stage.get('wasted_tokens', 0),
+            'breaker': model.breaker.state,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check hedging and circuit breaking against a fake provider")
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--fast", type=float, default=0.02)
+    parser.add_argument("--slow", type=float, default=0.5)
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    for mode, stats in simulate(args.calls, args.fast, args.slow, args.slow_fraction, args.error_rate).items():
+        print(f"{mode:>7}: p50={stats['p50']:.3f}s p99={stats['p99']:.3f}s failures={stats['failures']} "
+              f"hedge_rate={stats['hedge_rate']:.1%} wasted_tokens={stats['wasted_tokens']} "
+              f"breaker={stats['breaker']}")
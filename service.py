@@ -0,0 +1,238 @@
+import json
+import math
+import queue
+import threading
+import time
+import uuid
+import argparse
+from collections import deque
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Importing main compiles the graph, renders the Mermaid diagram and builds the
+# LLM client exactly once; every job served afterwards reuses that warm state.
+import main
+from registry import RunRegistry
+
+# Longest deadline a request may ask for
+MAX_DEADLINE_SECONDS = 24 * 3600
+
+
+class JobQueue:
+    """In-process job queue running generation jobs on warm worker threads"""
+
+    def __init__(self, workers: int = 2, workspace_root: str = "workspaces", max_memory: int = 20,
+                 max_finished: int = 1000):
+        self.workspace_root = Path(workspace_root)
+        self.workspace_root.mkdir(parents=True, exist_ok=True)
+        self.max_memory = max_memory
+        # One registry shared by every job, so runs can be listed across workspaces
+        self.registry = RunRegistry(self.workspace_root / 'runs.db')
+        self.jobs: Dict[str, Dict] = {}
+        # Finished jobs are kept in memory up to this many, oldest evicted first;
+        # the registry keeps the history of every run
+        self.max_finished = max_finished
+        self.finished = deque()
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.workers = []
+        for index in range(workers):
+            worker = threading.Thread(target=self._worker, name=f"job-worker-{index}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, prompt: str, deadline_seconds: Optional[float] = None, planning: str = None) -> Dict:
+        """Queue a generation job and return its public record"""
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'id': job_id,
+            'prompt': prompt,
+            'deadline_seconds': main.REQUEST_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds,
+            'planning': planning or main.PLANNING_MODE,
+            'status': 'queued',
+            'workspace': str(self.workspace_root / job_id),
+            'submitted_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None,
+        }
+        with self.lock:
+            self.jobs[job_id] = job
+        self.pending.put(job_id)
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of a job, or None if it is unknown"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self) -> List[Dict]:
+        """Return a snapshot of every known job without results"""
+        with self.lock:
+            return [
+                {key: value for key, value in job.items() if key != 'result'}
+                for job in self.jobs.values()
+            ]
+
+    def stats(self) -> Dict:
+        """Queue depth and job counts per status"""
+        with self.lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+        return {
+            'queue_depth': self.pending.qsize(),
+            'workers': len(self.workers),
+            'jobs': counts,
+        }
+
+    def read_result_file(self, job_id: str, relative_path: str) -> Optional[str]:
+        """Read a generated file from a job workspace, refusing paths outside it"""
+        job = self.get(job_id)
+        if not job:
+            return None
+        generated_dir = (Path(job['workspace']) / 'generated_files').resolve()
+        full_path = (generated_dir / relative_path).resolve()
+        if generated_dir not in full_path.parents or not full_path.is_file():
+            return None
+        return full_path.read_text(encoding='utf-8')
+
+    def _update(self, job_id: str, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def _finish(self, job_id: str):
+        with self.lock:
+            self.jobs[job_id]['finished_at'] = datetime.now().isoformat()
+            self.finished.append(job_id)
+            while len(self.finished) > self.max_finished:
+                self.jobs.pop(self.finished.popleft(), None)
+
+    def _worker(self):
+        while True:
+            job_id = self.pending.get()
+            job = self.get(job_id)
+            self._update(job_id, status='running', started_at=datetime.now().isoformat())
+            started = time.perf_counter()
+            try:
+                # Each job gets its own agents (and therefore its own bounded memory)
+                result = main.run_pipeline(
+                    job['prompt'],
+                    workspace=job['workspace'],
+                    max_memory=self.max_memory,
+                    deadline_seconds=job['deadline_seconds'],
+                    planning=job['planning'],
+                    registry=self.registry,
+                )
+                result['elapsed'] = time.perf_counter() - started
+                self._update(job_id, status=result['status'], result=result)
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {str(e)}")
+                self._update(job_id, status='failed', error=str(e))
+            finally:
+                self._finish(job_id)
+                self.pending.task_done()
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """HTTP front-end for the job queue"""
+
+    jobs: JobQueue = None
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = [part for part in self.path.split('?')[0].split('/') if part]
+        if parts == ['health']:
+            self._send_json(200, {'status': 'ok', **self.jobs.stats()})
+        elif parts == ['metrics']:
+            self._send_json(200, main.resilient_llm.metrics())
+        elif parts == ['runs']:
+            self._send_json(200, self.jobs.registry.list_runs())
+        elif parts == ['jobs']:
+            self._send_json(200, self.jobs.list_jobs())
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            job = self.jobs.get(parts[1])
+            if job:
+                self._send_json(200, job)
+            else:
+                self._send_json(404, {'error': 'job not found'})
+        elif len(parts) > 3 and parts[0] == 'jobs' and parts[2] == 'files':
+            content = self.jobs.read_result_file(parts[1], '/'.join(parts[3:]))
+            if content is None:
+                self._send_json(404, {'error': 'file not found'})
+            else:
+                self._send_json(200, {'path': '/'.join(parts[3:]), 'content': content})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {'error': 'invalid JSON body'})
+            return
+        if not isinstance(payload, dict):
+            self._send_json(400, {'error': 'JSON body must be an object'})
+            return
+        prompt = payload.get('prompt', '')
+        if not isinstance(prompt, str) or not prompt.strip():
+            self._send_json(400, {'error': "'prompt' is required and must be a string"})
+            return
+        prompt = prompt.strip()
+        deadline_seconds = payload.get('deadline_seconds')
+        if deadline_seconds is not None and not (
+                isinstance(deadline_seconds, (int, float)) and not isinstance(deadline_seconds, bool)
+                and math.isfinite(deadline_seconds) and 0 < deadline_seconds <= MAX_DEADLINE_SECONDS):
+            # Infinity or 1e308 would overflow the deadline arithmetic, 0 or less fails at once
+            self._send_json(400, {'error': "'deadline_seconds' must be a positive number of seconds "
+                                           f"up to {MAX_DEADLINE_SECONDS}"})
+            return
+        planning = payload.get('planning')
+        if planning not in (None, 'flat', 'hierarchical'):
+            self._send_json(400, {'error': "'planning' must be 'flat' or 'hierarchical'"})
+            return
+        self._send_json(202, self.jobs.submit(prompt, deadline_seconds, planning))
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: int = 2,
+          workspace_root: str = "workspaces", max_memory: int = 20, max_finished: int = 1000):
+    """Start the job workers and block serving HTTP requests"""
+    ServiceHandler.jobs = JobQueue(workers=workers, workspace_root=workspace_root, max_memory=max_memory,
+                                   max_finished=max_finished)
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    print(f"🚀 Service listening on http://{host}:{port} with {workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the code generator as a long-running service")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--workspace-root", default="workspaces")
+    parser.add_argument("--max-memory", type=int, default=20,
+                        help="Max generated files kept in each job's developer memory")
+    parser.add_argument("--max-finished-jobs", type=int, default=1000,
+                        help="Finished jobs kept in memory; older ones are only in the run registry")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.workspace_root, args.max_memory, args.max_finished_jobs)
@@ -0,0 +1,82 @@
+import pytest
+
+import patching
+
+
+def test_locate_error_lines_from_syntax_errors_and_tracebacks():
+    error = ('Traceback (most recent call last):\n'
+             '  File "/tmp/project/app/models.py", line 12, in <module>\n'
+             '  File "/usr/lib/python3/other.py", line 99, in f\n'
+             "models.py:30: error: expected ';'\n")
+    lines = patching.locate_error_lines('app/models.py', error, ["Syntax error on line 4: invalid syntax"])
+    assert lines == [4, 12, 30]
+
+
+def test_extract_region_clamps_to_file():
+    content = '\n'.join(f"line {n}" for n in range(1, 11))
+    start, end, text = patching.extract_region(content, [2, 9], context=3)
+    assert (start, end) == (1, 10)
+    start, end, text = patching.extract_region(content, [5], context=1)
+    assert (start, end, text) == (4, 6, "line 4\nline 5\nline 6")
+
+
+def test_number_lines_uses_file_line_numbers():
+    assert patching.number_lines("a\n\nc", start=9) == " 9 | a\n10 | \n11 | c"
+
+
+def test_extract_diff_strips_reasoning_and_fences():
+    response = ("<think>--- not a diff</think>Here is the fix:\n"
+                "```diff\n--- a/x.py\n+++ b/x.py\n@@ -1 +1 @@\n-a\n+b\n```\nDone.")
+    assert patching.extract_diff(response) == "--- a/x.py\n+++ b/x.py\n@@ -1 +1 @@\n-a\n+b"
+    assert patching.extract_diff("no diff here") == ''
+
+
+def test_parse_hunks_skips_file_headers_only_before_first_hunk():
+    diff = ("--- a/schema.sql\n+++ b/schema.sql\n"
+            "@@ -1,3 +1,2 @@\n"
+            " SELECT 1;\n"
+            "--- old comment\n"
+            "+++ counter\n"
+            " SELECT 2;\n")
+    [hunk] = patching.parse_hunks(diff)
+    assert hunk['old_start'] == 1
+    assert hunk['old'] == ["SELECT 1;", "-- old comment", "SELECT 2;"]
+    assert hunk['new'] == ["SELECT 1;", "++ counter", "SELECT 2;"]
+
+
+def test_apply_replaces_lines_and_keeps_trailing_newline():
+    content = "def f():\n    return 1 +\n\nprint(f())\n"
+    diff = "@@ -1,2 +1,2 @@\n def f():\n-    return 1 +\n+    return 1\n"
+    assert patching.apply_unified_diff(content, diff) == "def f():\n    return 1\n\nprint(f())\n"
+
+
+def test_apply_tolerates_shifted_line_numbers_and_whitespace():
+    content = "a\nb\nc   \nd\n"
+    diff = "@@ -1,2 +1,2 @@\n c\n-d\n+D\n"
+    # Context lines are written as they appear in the diff
+    assert patching.apply_unified_diff(content, diff) == "a\nb\nc\nD\n"
+
+
+def test_apply_removes_sql_comment_line():
+    content = "SELECT 1;\n-- old comment\nSELECT 2;\n"
+    diff = "--- a/q.sql\n+++ b/q.sql\n@@ -1,3 +1,2 @@\n SELECT 1;\n--- old comment\n SELECT 2;\n"
+    assert patching.apply_unified_diff(content, diff) == "SELECT 1;\nSELECT 2;\n"
+
+
+def test_apply_pure_insertion_goes_after_anchor_line():
+    assert patching.apply_unified_diff("a\nb\nc\n", "@@ -2,0 +3,1 @@\n+INSERTED\n") == "a\nb\nINSERTED\nc\n"
+    assert patching.apply_unified_diff("a\nb\n", "@@ -0,0 +1,1 @@\n+TOP\n") == "TOP\na\nb\n"
+
+
+def test_apply_multiple_hunks():
+    content = "1\n2\n3\n4\n5\n6\n"
+    diff = "@@ -1,1 +1,1 @@\n-1\n+one\n@@ -5,1 +5,1 @@\n-5\n+five\n"
+    assert patching.apply_unified_diff(content, diff) == "one\n2\n3\n4\nfive\n6\n"
+
+
+def test_apply_rejects_mismatched_or_empty_diff():
+    with pytest.raises(patching.PatchError):
+        patching.apply_unified_diff("a\nb\n", "@@ -1,1 +1,1 @@\n-zzz\n+y\n")
+    with pytest.raises(patching.PatchError):
+        patching.apply_unified_diff("a\n", "")
+
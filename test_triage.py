@@ -0,0 +1,55 @@
+import subprocess
+from pathlib import Path
+
+import toolchains
+import triage
+
+
+def write(root: Path, files: dict):
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding='utf-8')
+
+
+def test_nested_package_imports_resolve_from_project_root(tmp_path):
+    project = tmp_path / 'project'
+    write(project, {
+        'storage/__init__.py': '',
+        'storage/db.py': 'def save(item):\n    return item\n',
+        'auth/__init__.py': '',
+        'auth/service.py': 'from storage.db import save\n\nprint(save("user"))\n',
+        'auth/tokens.py': 'from .service import save\n\nprint(save("token"))\n',
+    })
+    cache = toolchains.BuildCache(str(tmp_path / 'cache'))
+    verdicts = triage.triage_files(str(project), ['auth/service.py', 'auth/tokens.py', 'storage/db.py'],
+                                   'python', cache, timeout=60)
+    assert {path: verdict['status'] for path, verdict in verdicts.items()} == {
+        'auth/service.py': 'ok', 'auth/tokens.py': 'ok', 'storage/db.py': 'ok'}
+
+
+def test_missing_generated_module_is_a_code_issue(tmp_path):
+    project = tmp_path / 'project'
+    write(project, {
+        'storage/__init__.py': '',
+        'auth/__init__.py': '',
+        'auth/service.py': 'import importlib\n\nimportlib.import_module("storage.db")\n',
+    })
+    cache = toolchains.BuildCache(str(tmp_path / 'cache'))
+    verdict = triage.triage_file(project, 'auth/service.py', 'python', cache, timeout=60)
+    assert verdict['status'] == 'code'
+    assert "No module named 'storage.db'" in verdict['code_issues'][0]
+
+
+def test_syntax_checker_failure_is_an_environment_issue(tmp_path, monkeypatch):
+    project = tmp_path / 'project'
+    write(project, {'main.go': 'package main\n\nfunc main() {}\n'})
+    cache = toolchains.BuildCache(str(tmp_path / 'cache'))
+
+    def hang(*args, **kwargs):
+        raise subprocess.TimeoutExpired(['gofmt'], kwargs.get('timeout'))
+    monkeypatch.setattr(toolchains, 'is_available', lambda language: True)
+    monkeypatch.setattr(toolchains.subprocess, 'run', hang)
+    verdict = triage.triage_file(project, 'main.go', 'go', cache, timeout=5)
+    assert verdict['status'] == 'environment'
+    assert verdict['code_issues'] == []
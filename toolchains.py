@@ -0,0 +1,380 @@
+import ast
+import os
+import re
+import sys
+import shutil
+import hashlib
+import time
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# Per-language commands. Placeholders are filled in by BuildCache:
+#   {file} current file, {sources} every project source (expands to many args),
+#   {entry} source holding the entry point, {object} / {objects} compiled units,
+#   {binary} linked program, {out_dir} compiler output directory,
+#   {main_class} Java class to run, {compiled} compiled form of the current file,
+#   {includes} -iquote flags for local headers (expands to many args),
+#   {module} dotted module name of the current file
+# run_from: "project" runs programs from the project root (with the root on
+# PYTHONPATH), otherwise they run from their own directory.
+# mode: "interpreted" runs files directly, "per_unit" compiles each translation
+# unit separately and links them (ccache-style), "whole" compiles the project at once.
+TOOLCHAINS: Dict[str, Dict] = {
+    'python': {
+        'extensions': ['.py'],
+        'mode': 'interpreted',
+        'requires': [sys.executable],
+        'syntax': None,  # Checked in-process with ast
+        'run': [sys.executable, '{file}'],
+        # Run as a module so "from storage.db import save" in auth/service.py and
+        # relative imports resolve the way they do when the project is started
+        'run_module': [sys.executable, '-m', '{module}'],
+        'run_from': 'project',
+        'entry_pattern': None,
+    },
+    'javascript': {
+        'extensions': ['.js', '.mjs', '.cjs'],
+        'mode': 'interpreted',
+        'requires': ['node'],
+        'syntax': ['node', '--check', '{file}'],
+        'run': ['node', '{file}'],
+        'entry_pattern': None,
+    },
+    'ruby': {
+        'extensions': ['.rb'],
+        'mode': 'interpreted',
+        'requires': ['ruby'],
+        'syntax': ['ruby', '-c', '{file}'],
+        'run': ['ruby', '{file}'],
+        'entry_pattern': None,
+    },
+    'go': {
+        'extensions': ['.go'],
+        'mode': 'interpreted',  # go run already uses Go's own build cache
+        'requires': ['go', 'gofmt'],
+        'syntax': ['gofmt', '-e', '-l', '{file}'],
+        # Run the whole package (from the file's directory) so package main can span files
+        'run': ['go', 'run', '.'],
+        'entry_pattern': r'func\s+main\s*\(',
+    },
+    'c': {
+        'extensions': ['.c'],
+        'headers': ['.h'],
+        'mode': 'per_unit',
+        'requires': ['gcc'],
+        'syntax': ['gcc', '-fsyntax-only', '{includes}', '{file}'],
+        'compile': ['gcc', '-c', '{includes}', '{file}', '-o', '{object}'],
+        'link': ['gcc', '{objects}', '-o', '{binary}'],
+        'run': ['{binary}'],
+        'entry_pattern': r'\bmain\s*\(',
+    },
+    'cpp': {
+        'extensions': ['.cpp', '.cc', '.cxx'],
+        'headers': ['.h', '.hpp', '.hh'],
+        'mode': 'per_unit',
+        'requires': ['g++'],
+        'syntax': ['g++', '-std=c++17', '-fsyntax-only', '{includes}', '{file}'],
+        'compile': ['g++', '-std=c++17', '-c', '{includes}', '{file}', '-o', '{object}'],
+        'link': ['g++', '{objects}', '-o', '{binary}'],
+        'run': ['{binary}'],
+        'entry_pattern': r'\bmain\s*\(',
+    },
+    'java': {
+        'extensions': ['.java'],
+        'mode': 'whole',
+        'requires': ['javac', 'java'],
+        'syntax': None,  # javac needs the whole project, so the build is the check
+        'compile': ['javac', '-d', '{out_dir}', '{sources}'],
+        'run': ['java', '-cp', '{out_dir}', '{main_class}'],
+        'entry_pattern': r'static\s+void\s+main\s*\(',
+    },
+    'typescript': {
+        'extensions': ['.ts'],
+        'mode': 'whole',
+        'requires': ['tsc', 'node'],
+        'syntax': None,
+        'compile': ['tsc', '--outDir', '{out_dir}', '--rootDir', '{project}', '{sources}'],
+        'run': ['node', '{compiled}'],
+        'entry_pattern': None,
+    },
+    'rust': {
+        'extensions': ['.rs'],
+        'mode': 'whole',
+        'requires': ['rustc'],
+        'syntax': None,
+        'compile': ['rustc', '--edition', '2021', '{entry}', '-o', '{binary}'],
+        'run': ['{binary}'],
+        'entry_pattern': r'fn\s+main\s*\(',
+    },
+    'csharp': {
+        'extensions': ['.cs'],
+        'mode': 'whole',
+        'requires': ['mcs', 'mono'],
+        'syntax': None,
+        'compile': ['mcs', '-out:{binary}', '{sources}'],
+        'run': ['mono', '{binary}'],
+        'entry_pattern': r'static\s+\w*\s*void\s+Main\s*\(',
+    },
+}
+
+# Names the PM agent may use for a language
+# Upper bounds for a single syntax check and build step; callers with a
+# deadline pass a smaller timeout
+SYNTAX_TIMEOUT = 60
+BUILD_TIMEOUT = 300
+
+
+def _cap(timeout: Optional[float], limit: float) -> float:
+    return limit if timeout is None else max(0, min(timeout, limit))
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0, deadline - time.monotonic())
+
+
+LANGUAGE_ALIASES = {
+    'python3': 'python', 'py': 'python',
+    'js': 'javascript', 'node': 'javascript', 'node.js': 'javascript', 'nodejs': 'javascript',
+    'ts': 'typescript',
+    'c++': 'cpp', 'cplusplus': 'cpp',
+    'c#': 'csharp', 'cs': 'csharp', '.net': 'csharp',
+    'golang': 'go',
+}
+
+
+def resolve_language(name: str) -> Optional[str]:
+    """Normalize a blueprint language name to a TOOLCHAINS key"""
+    if not name:
+        return None
+    key = name.strip().lower()
+    key = LANGUAGE_ALIASES.get(key, key)
+    return key if key in TOOLCHAINS else None
+
+
+def language_for_file(file_path: str, default: str = None) -> Optional[str]:
+    """Pick the toolchain for a file from its extension, else from the blueprint language"""
+    suffix = Path(file_path).suffix.lower()
+    for language, toolchain in TOOLCHAINS.items():
+        if suffix in toolchain['extensions']:
+            return language
+    return None if suffix else resolve_language(default)
+
+
+def is_available(language: str) -> bool:
+    """True if every executable the toolchain needs is installed"""
+    return all(shutil.which(binary) for binary in TOOLCHAINS[language]['requires'])
+
+
+def _digest(*parts: Union[str, bytes]) -> str:
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part.encode('utf-8') if isinstance(part, str) else part)
+        sha.update(b'\0')
+    return sha.hexdigest()[:24]
+
+
+def _expand(template: List[str], values: Dict) -> List[str]:
+    command = []
+    for arg in template:
+        if arg in ('{sources}', '{objects}', '{includes}'):
+            command.extend(str(value) for value in values.get(arg.strip('{}'), []))
+        else:
+            command.append(arg.format(**{key: value for key, value in values.items()
+                                         if not isinstance(value, list)}))
+    return command
+
+
+class BuildCache:
+    """Runs syntax checks, builds and executions, caching build outputs by source hash"""
+
+    def __init__(self, cache_dir: str = ".build_cache"):
+        self.cache_dir = Path(cache_dir).resolve()
+        self.hits = 0
+        self.misses = 0
+        # Files are checked in parallel; builds of the same project must not race
+        self.build_lock = threading.Lock()
+
+    def check_syntax(self, file_path: str, content: str, language: str = None,
+                     project_dir: str = None, timeout: Optional[float] = None) -> List[str]:
+        """Syntax-check ``content`` as if it were ``file_path`` of ``project_dir``.
+
+        The content is checked from a temporary copy, so local includes are
+        resolved against the file's real directory and the project root.
+        Raises subprocess.TimeoutExpired or OSError when the checker itself
+        cannot finish, which says nothing about the code.
+        """
+        language = language_for_file(file_path, language)
+        if language is None:
+            return []
+        if language == 'python':
+            try:
+                ast.parse(content)
+                return []
+            except SyntaxError as e:
+                return [f"Syntax error on line {e.lineno}: {e.msg}"]
+        toolchain = TOOLCHAINS[language]
+        if not toolchain['syntax'] or not is_available(language):
+            return []
+        with tempfile.TemporaryDirectory() as tmp:
+            probe = Path(tmp) / Path(file_path).name
+            probe.write_text(content, encoding='utf-8')
+            includes = []
+            if project_dir is not None:
+                project_dir = Path(project_dir).resolve()
+                for directory in dict.fromkeys([(project_dir / file_path).parent, project_dir]):
+                    includes.extend(['-iquote', directory])
+            result = subprocess.run(_expand(toolchain['syntax'], {'file': probe, 'includes': includes}),
+                                    capture_output=True, text=True,
+                                    timeout=_cap(timeout, SYNTAX_TIMEOUT))
+        if result.returncode == 0:
+            return []
+        return [(result.stderr or result.stdout).strip().replace(str(probe), Path(file_path).name)]
+
+    def execute(self, project_dir: str, file_path: str, language: str = None,
+                timeout: Optional[float] = None) -> Union[bool, str]:
+        """Build (if needed) and run a file; True on success, otherwise the error output"""
+        language = language_for_file(file_path, language)
+        if language is None:
+            # Data and config files (requirements.txt, package.json, ...) are not executable
+            return True
+        if not is_available(language):
+            print(f"⚠️ No local {language} toolchain, skipping execution of {file_path}")
+            return True
+
+        toolchain = TOOLCHAINS[language]
+        started = time.monotonic()
+        # Absolute paths, since programs run from their own directory or the project root
+        project_dir = Path(project_dir).resolve()
+        full_path = project_dir / file_path
+        values = {'file': full_path, 'project': project_dir, 'includes': ['-iquote', project_dir]}
+
+        with self.build_lock:
+            if toolchain['mode'] == 'per_unit':
+                error = self._build_units(language, project_dir, values, timeout)
+            elif toolchain['mode'] == 'whole':
+                error = self._build_whole(language, project_dir, full_path, values, timeout)
+            else:
+                error = None
+        if error:
+            return error
+
+        pattern = toolchain['entry_pattern']
+        if pattern and not re.search(pattern, full_path.read_text(encoding='utf-8', errors='ignore')):
+            # Library unit: building it is the check
+            return True
+        if 'binary' not in values and '{binary}' in toolchain['run']:
+            return True
+        if timeout is not None:
+            # Building (and waiting for the build lock) spends the same budget
+            timeout = max(0, timeout - (time.monotonic() - started))
+        if toolchain.get('run_from') == 'project':
+            env = dict(os.environ)
+            env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(project_dir), env.get('PYTHONPATH')]))
+            parts = full_path.relative_to(project_dir).with_suffix('').parts
+            if toolchain.get('run_module') and all(part.isidentifier() for part in parts):
+                values['module'] = '.'.join(parts)
+                return self._run(_expand(toolchain['run_module'], values), timeout, cwd=project_dir, env=env)
+            return self._run(_expand(toolchain['run'], values), timeout, cwd=project_dir, env=env)
+        return self._run(_expand(toolchain['run'], values), timeout, cwd=full_path.parent)
+
+    def _sources(self, language: str, project_dir: Path, extra: List[str] = ()) -> List[Path]:
+        suffixes = set(TOOLCHAINS[language]['extensions']) | set(extra)
+        return sorted(path for path in project_dir.rglob('*')
+                      if path.suffix.lower() in suffixes and path.is_file())
+
+    def _cached_step(self, entry_dir: Path, command: List[str], timeout: Optional[float] = None) -> Optional[str]:
+        """Run a build step unless its result is already cached in ``entry_dir``.
+
+        Failed steps are cached too, so an untouched unit that does not compile
+        is not recompiled on every correction round.
+        """
+        status_file = entry_dir / 'status'
+        if status_file.exists():
+            self.hits += 1
+            status = status_file.read_text(encoding='utf-8')
+            return None if status == 'ok' else status
+        self.misses += 1
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            result = subprocess.run(command, capture_output=True, text=True,
+                                    timeout=_cap(timeout, BUILD_TIMEOUT))
+        except subprocess.TimeoutExpired:
+            return f"Build step timed out: {' '.join(command)}"
+        status = 'ok' if result.returncode == 0 else (result.stderr or result.stdout or 'build failed')
+        status_file.write_text(status, encoding='utf-8')
+        return None if status == 'ok' else status
+
+    def _build_units(self, language: str, project_dir: Path, values: Dict,
+                     timeout: Optional[float] = None) -> Optional[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        toolchain = TOOLCHAINS[language]
+        headers = self._sources(language, project_dir, toolchain.get('headers', []))
+        # Headers are folded into every unit's key, so editing one rebuilds its users
+        header_digest = _digest(*[path.read_bytes() for path in headers
+                                  if path.suffix.lower() in toolchain.get('headers', [])])
+        objects, errors, has_entry = [], [], False
+        for source in self._sources(language, project_dir):
+            content = source.read_bytes()
+            key = _digest(' '.join(toolchain['compile']), header_digest, content)
+            entry_dir = self.cache_dir / language / key
+            obj = entry_dir / 'unit.o'
+            command = _expand(toolchain['compile'], {**values, 'file': source, 'object': obj})
+            error = self._cached_step(entry_dir, command, _remaining(deadline))
+            if error:
+                errors.append(error)
+            objects.append(obj)
+            has_entry = has_entry or bool(re.search(toolchain['entry_pattern'],
+                                                    content.decode('utf-8', errors='ignore')))
+        if errors:
+            return '\n'.join(errors)
+        if not has_entry:
+            return None
+        key = _digest(' '.join(toolchain['link']), *[str(obj) for obj in objects])
+        entry_dir = self.cache_dir / language / f"link-{key}"
+        values['binary'] = entry_dir / 'program'
+        values['objects'] = objects
+        return self._cached_step(entry_dir, _expand(toolchain['link'], values), _remaining(deadline))
+
+    def _build_whole(self, language: str, project_dir: Path, full_path: Path, values: Dict,
+                     timeout: Optional[float] = None) -> Optional[str]:
+        toolchain = TOOLCHAINS[language]
+        sources = self._sources(language, project_dir)
+        if not sources:
+            return None
+        pattern = toolchain['entry_pattern']
+        entries = [path for path in sources
+                   if pattern and re.search(pattern, path.read_text(encoding='utf-8', errors='ignore'))]
+        entry = full_path if full_path in entries else (entries[0] if entries else full_path)
+
+        key = _digest(' '.join(toolchain['compile']), str(entry.relative_to(project_dir)),
+                      *[str(path.relative_to(project_dir)).encode('utf-8') + path.read_bytes()
+                        for path in sources])
+        entry_dir = self.cache_dir / language / key
+        values.update({
+            'sources': sources,
+            'entry': entry,
+            'out_dir': entry_dir / 'out',
+            'binary': entry_dir / 'program',
+            'compiled': (entry_dir / 'out' / full_path.relative_to(project_dir)).with_suffix('.js'),
+            'main_class': self._java_main_class(full_path if full_path in entries else entry),
+        })
+        (entry_dir / 'out').mkdir(parents=True, exist_ok=True)
+        return self._cached_step(entry_dir, _expand(toolchain['compile'], values), timeout)
+
+    def _java_main_class(self, source: Path) -> str:
+        content = source.read_text(encoding='utf-8', errors='ignore')
+        package = re.search(r'^\s*package\s+([\w.]+)\s*;', content, flags=re.MULTILINE)
+        return f"{package.group(1)}.{source.stem}" if package else source.stem
+
+    def _run(self, command: List[str], timeout: Optional[float], cwd: Path,
+             env: Dict[str, str] = None) -> Union[bool, str]:
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=timeout, cwd=cwd, env=env)
+        except subprocess.TimeoutExpired:
+            return f"Execution timed out after {timeout:.0f} seconds"
+        if result.returncode == 0:
+            return True
+        return result.stderr or result.stdout or f"Exited with code {result.returncode}"
@@ -0,0 +1,240 @@
+import re
+import ast
+import sys
+import builtins
+import subprocess
+import importlib.util
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+import toolchains
+
+# File stems treated as the application entry point; "app" is left out because
+# it is just as often a module (a Flask app object started from main.py)
+ENTRY_STEMS = {'main', 'index', 'program', '__main__'}
+
+# Names every module can use without binding them
+IMPLICIT_NAMES = set(dir(builtins)) | {
+    '__file__', '__name__', '__doc__', '__builtins__', '__spec__',
+    '__loader__', '__package__', '__path__', '__annotations__',
+}
+
+# Execution failures caused by the machine rather than the code
+ENVIRONMENT_ERRORS = [
+    r"No local \w+ toolchain",
+    r"command not found",
+    r"No such file or directory",
+    r"Permission denied",
+    r"Address already in use",
+    r"Connection refused",
+    r"Could not connect|could not connect|Name or service not known",
+    r"Execution timed out",  # Servers and interactive programs never exit on their own
+    r"Build step timed out",
+    r"EOFError",             # Programs waiting on input()
+    r"pip install",
+]
+
+
+def is_entry_point(file_path: str) -> bool:
+    return Path(file_path).stem.lower() in ENTRY_STEMS
+
+
+def is_local_module(module: str, project_dir: Path, file_dir: Path) -> bool:
+    """True if the top-level module is a file or package inside the generated project"""
+    top = module.split('.')[0]
+    return any((base / f"{top}.py").exists() or (base / top).is_dir() for base in (project_dir, file_dir))
+
+
+def module_names(tree: ast.AST) -> Optional[set]:
+    """Top-level names a module defines, or None if that cannot be known statically"""
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+            if node.name == '__getattr__':
+                return None
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == '*':
+                    return None
+                names.add((alias.asname or alias.name).split('.')[0])
+        else:
+            for child in ast.walk(node):
+                if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                    names.add(child.id)
+    return names
+
+
+def undefined_names(tree: ast.AST) -> List[Tuple[str, int]]:
+    """Names read somewhere in the module but never bound anywhere in it.
+
+    Deliberately scope-insensitive so it only reports names that cannot
+    resolve at all (typos, missing imports) and stays free of false positives
+    for ordinary code.
+    """
+    bound = set(IMPLICIT_NAMES)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, ast.alias):
+            if node.name == '*':
+                return []
+            bound.add((node.asname or node.name).split('.')[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+        elif isinstance(getattr(node, 'name', None), str):
+            # match-statement captures and type parameters
+            bound.add(node.name)
+        elif isinstance(getattr(node, 'rest', None), str):
+            bound.add(node.rest)
+
+    missing = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in bound:
+            missing.setdefault(node.id, node.lineno)
+    return sorted(missing.items(), key=lambda item: item[1])
+
+
+def check_imports(tree: ast.AST, project_dir: Path, file_dir: Path) -> Tuple[List[str], List[str]]:
+    """Resolve imports; returns (code_issues, environment_issues)"""
+    code_issues, environment_issues = [], []
+    stdlib = getattr(sys, 'stdlib_module_names', set())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [(alias.name, None) for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                # Relative imports must point at generated files
+                base = file_dir
+                for _ in range(node.level - 1):
+                    base = base.parent
+                target = base.joinpath(*node.module.split('.')) if node.module else base
+                if not (target.with_suffix('.py').exists() or target.is_dir()):
+                    code_issues.append(f"Line {node.lineno}: relative import '{'.' * node.level}{node.module or ''}' not found")
+                continue
+            modules = [(node.module, [alias.name for alias in node.names])]
+        else:
+            continue
+
+        for module, imported in modules:
+            top = module.split('.')[0]
+            if is_local_module(module, project_dir, file_dir):
+                code_issues.extend(check_local_names(module, imported, node.lineno, project_dir, file_dir))
+            elif top in stdlib or top in sys.builtin_module_names:
+                continue
+            elif importlib.util.find_spec(top) is None:
+                environment_issues.append(f"Line {node.lineno}: package '{top}' is not installed")
+    return code_issues, environment_issues
+
+
+def check_local_names(module: str, imported: Optional[List[str]], lineno: int,
+                      project_dir: Path, file_dir: Path) -> List[str]:
+    """Check that names imported from a generated module are defined in it"""
+    if not imported:
+        return []
+    parts = module.split('.')
+    for base in (file_dir, project_dir):
+        module_file = base.joinpath(*parts).with_suffix('.py')
+        package_dir = base.joinpath(*parts)
+        if module_file.exists():
+            break
+        if package_dir.is_dir():
+            module_file = package_dir / '__init__.py'
+            break
+    else:
+        return []
+    try:
+        defined = module_names(ast.parse(module_file.read_text(encoding='utf-8')))
+    except (OSError, SyntaxError, ValueError):
+        # A broken module is reported when that file is triaged
+        return []
+    if defined is None:
+        return []
+    return [f"Line {lineno}: '{name}' is not defined in {module}"
+            for name in imported
+            if name != '*' and name not in defined
+            and not (module_file.parent / f"{name}.py").exists()]
+
+
+def has_python_entry(tree: ast.AST) -> bool:
+    """True for an ``if __name__ == '__main__'`` block or a top-level call"""
+    for node in tree.body:
+        if isinstance(node, ast.If) and isinstance(node.test, ast.Compare) and \
+                isinstance(node.test.left, ast.Name) and node.test.left.id == '__name__':
+            return True
+        if isinstance(node, ast.Expr) and isinstance(node.value, (ast.Call, ast.Await)):
+            return True
+    return False
+
+
+def classify_execution_error(error: Union[bool, str], project_dir: Path, file_dir: Path) -> Optional[str]:
+    """None if execution passed, else 'environment' or 'code'"""
+    if error is True:
+        return None
+    missing = re.search(r"ModuleNotFoundError: No module named '([\w.]+)'", error or '')
+    if missing:
+        # A missing generated module is a code defect, a missing package is not
+        return 'code' if is_local_module(missing.group(1), project_dir, file_dir) else 'environment'
+    if any(re.search(pattern, error or '') for pattern in ENVIRONMENT_ERRORS):
+        return 'environment'
+    return 'code'
+
+
+def triage_file(project_dir: Path, file_path: str, language: str, build_cache: toolchains.BuildCache,
+                timeout: Optional[float] = None, execute: bool = True) -> Dict:
+    """Run the cheap checks on one file and classify it as ok, environment or code"""
+    full_path = project_dir / file_path
+    file_dir = full_path.parent
+    code_issues, environment_issues = [], []
+    try:
+        content = full_path.read_text(encoding='utf-8')
+    except OSError as e:
+        return {'status': 'code', 'code_issues': [str(e)], 'environment_issues': []}
+
+    file_language = toolchains.language_for_file(file_path, language)
+    try:
+        code_issues.extend(build_cache.check_syntax(file_path, content, language, project_dir, timeout))
+    except (subprocess.TimeoutExpired, OSError) as e:
+        # The checker hung or is missing: nothing is known about the code
+        return {'status': 'environment', 'code_issues': [], 'environment_issues': [f"Syntax check failed: {e}"]}
+    if not code_issues and file_language == 'python':
+        tree = ast.parse(content)
+        import_code, import_environment = check_imports(tree, project_dir, file_dir)
+        code_issues.extend(import_code)
+        environment_issues.extend(import_environment)
+        code_issues.extend(f"Line {line}: name '{name}' is not defined" for name, line in undefined_names(tree))
+        if is_entry_point(file_path) and not has_python_entry(tree):
+            code_issues.append("Entry point has no __main__ block or top-level call")
+    elif not code_issues and file_language and is_entry_point(file_path):
+        pattern = toolchains.TOOLCHAINS[file_language]['entry_pattern']
+        if pattern and not re.search(pattern, content):
+            code_issues.append(f"Entry point has no {file_language} main function")
+
+    if not code_issues and execute:
+        # Static checks passed: one execution tells runtime defects from a broken environment
+        result = build_cache.execute(project_dir, file_path, language, timeout)
+        verdict = classify_execution_error(result, project_dir, file_dir)
+        if verdict == 'code':
+            code_issues.append(result)
+        elif verdict == 'environment':
+            environment_issues.append(result.strip().splitlines()[-1] if result.strip() else result)
+
+    status = 'code' if code_issues else ('environment' if environment_issues else 'ok')
+    return {'status': status, 'code_issues': code_issues, 'environment_issues': environment_issues}
+
+
+def triage_files(project_dir: str, file_paths: List[str], language: str, build_cache: toolchains.BuildCache,
+                 timeout: Optional[float] = None, workers: int = 8) -> Dict[str, Dict]:
+    """Triage every file in parallel; returns {file_path: verdict}"""
+    project_dir = Path(project_dir)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        verdicts = pool.map(lambda path: triage_file(project_dir, path, language, build_cache, timeout),
+                            file_paths)
+        return dict(zip(file_paths, verdicts))
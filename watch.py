@@ -0,0 +1,398 @@
+import os
+import re
+import ast
+import io
+import json
+import time
+import argparse
+from collections import Counter
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+import toolchains
+import triage
+
+# Both are optional: without inotify the watcher polls, without pyflakes it skips lint warnings
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+try:
+    from pyflakes import api as pyflakes_api, reporter as pyflakes_reporter
+except ImportError:
+    pyflakes_api = None
+
+# Directories and editor artefacts that never hold generated sources
+IGNORED_DIRS = {'__pycache__', 'node_modules', 'target', 'bin', 'obj'}
+IGNORED_SUFFIXES = ('~', '.swp', '.swx', '.tmp', '.pyc', '.o', '.class')
+
+# Relative imports of languages whose files are built and run one by one
+JS_IMPORT = re.compile(r"""(?:require\s*\(|import\s*\(|from)\s*['"](\.{1,2}/[^'"]+)['"]""")
+C_INCLUDE = re.compile(r'#\s*include\s*"([^"]+)"')
+RUBY_REQUIRE = re.compile(r"""require_relative\s*\(?\s*['"]([^'"]+)['"]""")
+
+CACHE_LIMIT = 5000
+
+
+def _relative(project_dir: Path, path: Path) -> Optional[str]:
+    """``path`` relative to the project, or None if it lies outside it"""
+    try:
+        return path.resolve().relative_to(project_dir.resolve()).as_posix()
+    except ValueError:
+        return None
+
+
+def python_imports(project_dir: Path, file_path: str, content: str) -> Set[str]:
+    """Generated files a Python module imports, as paths relative to ``project_dir``"""
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        return set()
+    file_dir = (project_dir / file_path).parent
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.extend((project_dir, file_dir, alias.name.split('.')) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            parts = node.module.split('.') if node.module else []
+            if node.level:
+                base = file_dir
+                for _ in range(node.level - 1):
+                    base = base.parent
+                bases = (base,)
+            else:
+                bases = (project_dir, file_dir)
+            for base in bases:
+                modules.append((base, None, parts))
+                # "from package import module" imports a file too
+                modules.extend((base, None, parts + [alias.name]) for alias in node.names)
+    found = set()
+    for first, second, parts in modules:
+        for base in filter(None, (first, second)):
+            # Importing a.b.c runs a/__init__.py and a/b/__init__.py as well
+            for depth in range(1, len(parts) + 1):
+                target = base.joinpath(*parts[:depth])
+                for candidate in (target.with_suffix('.py'), target / '__init__.py'):
+                    if candidate.is_file():
+                        found.add(_relative(project_dir, candidate))
+    found.discard(file_path)
+    found.discard(None)
+    return found
+
+
+def relative_imports(project_dir: Path, file_path: str, content: str, language: str) -> Set[str]:
+    """Generated files a JavaScript, TypeScript, C, C++ or Ruby file pulls in"""
+    file_dir = (project_dir / file_path).parent
+    if language in ('javascript', 'typescript'):
+        targets, suffixes = JS_IMPORT.findall(content), ['', '.js', '.ts', '.mjs', '/index.js', '/index.ts']
+    elif language in ('c', 'cpp'):
+        targets, suffixes = C_INCLUDE.findall(content), ['']
+    elif language == 'ruby':
+        targets, suffixes = RUBY_REQUIRE.findall(content), ['', '.rb']
+    else:
+        return set()
+    found = set()
+    for target in targets:
+        for base in (file_dir, project_dir):
+            matches = [base / f"{target}{suffix}" for suffix in suffixes]
+            match = next((path for path in matches if path.is_file()), None)
+            if match is not None:
+                found.add(_relative(project_dir, match))
+                break
+    found.discard(None)
+    return found
+
+
+def lint(file_path: str, content: str) -> List[str]:
+    """pyflakes warnings (unused imports, redefinitions, ...) for a Python file"""
+    if pyflakes_api is None or not file_path.endswith('.py'):
+        return []
+    warnings, errors = io.StringIO(), io.StringIO()
+    pyflakes_api.check(content, file_path, pyflakes_reporter.Reporter(warnings, errors))
+    return [line for line in warnings.getvalue().splitlines() if line]
+
+
+class ProjectWatcher:
+    """Re-verifies hand-edited generated files without rerunning the pipeline.
+
+    Changes are debounced, then only the changed files and the files that
+    (transitively) import them are checked again with the triage checks.
+    Verdicts are cached by the hash of a file and everything it imports, so
+    unchanged files and reverted edits are never re-checked (environment
+    verdicts excepted, they depend on the machine). With ``fix``,
+    files with code defects go through the DebuggerAgent.
+    """
+
+    def __init__(self, project_dir: str = "generated_files", language: str = None,
+                 interval: float = 0.5, debounce: float = 0.3, exec_timeout: float = 10,
+                 execute: bool = True, fix: bool = False, llm=None,
+                 file_infos: Optional[Dict[str, Tuple]] = None, workers: int = 8):
+        self.project_dir = Path(project_dir)
+        self.interval = interval
+        self.debounce = debounce
+        self.exec_timeout = exec_timeout
+        self.execute = execute
+        self.fix = fix
+        self.llm = llm
+        self.file_infos = file_infos or {}
+        self.workers = workers
+        # Shared with the pipeline's DebuggerAgent, so compiled units built during the run are reused
+        self.build_cache = toolchains.BuildCache(self.project_dir.parent / ".build_cache")
+        self.cache_path = self.project_dir.parent / ".watch_cache.json"
+        self.cache = self._load_cache()
+        self.snapshot: Dict[str, Tuple[int, int]] = {}
+        self.hashes: Dict[str, str] = {}
+        self.imports: Dict[str, Set[str]] = {}
+        self.verdicts: Dict[str, Dict] = {}
+        self.written: Dict[str, str] = {}  # Content hash of the last fix written per file
+        self.inotify = INotify() if INotify is not None else None
+        self.watched_dirs = set()
+        self.language = toolchains.resolve_language(language) or self._guess_language()
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        try:
+            cache = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        # Caches written by older versions may hold environment verdicts
+        return {key: verdict for key, verdict in cache.items() if verdict.get('status') != 'environment'}
+
+    def _save_cache(self):
+        entries = list(self.cache.items())[-CACHE_LIMIT:]
+        self.cache_path.write_text(json.dumps(dict(entries)))
+
+    def _guess_language(self) -> Optional[str]:
+        """Most common toolchain language among the generated files"""
+        counts = Counter(toolchains.language_for_file(path) for path in self.scan())
+        counts.pop(None, None)
+        return counts.most_common(1)[0][0] if counts else None
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """(mtime, size) of every generated file, keyed by path relative to the project"""
+        snapshot = {}
+        stack = [self.project_dir]
+        while stack:
+            directory = stack.pop()
+            if self.inotify is not None and directory not in self.watched_dirs:
+                self.inotify.add_watch(str(directory), inotify_flags.CREATE | inotify_flags.DELETE |
+                                       inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO |
+                                       inotify_flags.MOVED_FROM | inotify_flags.MODIFY)
+                self.watched_dirs.add(directory)
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORED_DIRS:
+                        stack.append(Path(entry.path))
+                elif entry.is_file() and not entry.name.endswith(IGNORED_SUFFIXES):
+                    stat = entry.stat()
+                    snapshot[Path(entry.path).relative_to(self.project_dir).as_posix()] = \
+                        (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _sleep(self, seconds: float):
+        """Wait for filesystem events (or just sleep when polling)"""
+        if self.inotify is not None:
+            self.inotify.read(timeout=int(seconds * 1000))
+        else:
+            time.sleep(seconds)
+
+    def wait_for_changes(self) -> Set[str]:
+        """Block until files change and then stay quiet for ``debounce`` seconds"""
+        while True:
+            self._sleep(self.interval)
+            current = self.scan()
+            if current != self.snapshot:
+                break
+        # Editors save in bursts (temp file, rename, chmod); wait for the burst to end
+        while True:
+            self._sleep(self.debounce)
+            latest = self.scan()
+            if latest == current:
+                break
+            current = latest
+        changed = {path for path in set(current) | set(self.snapshot)
+                   if current.get(path) != self.snapshot.get(path)}
+        self.snapshot = current
+        return changed
+
+    def update_graph(self, paths: Set[str]):
+        """Refresh content hashes of ``paths`` and the import edges they affect"""
+        added_or_removed = False
+        for path in paths:
+            full_path = self.project_dir / path
+            if not full_path.is_file():
+                added_or_removed |= self.hashes.pop(path, None) is not None
+                self.imports.pop(path, None)
+                self.verdicts.pop(path, None)
+                continue
+            added_or_removed |= path not in self.hashes
+            self.hashes[path] = toolchains._digest(full_path.read_text(encoding='utf-8', errors='replace'))
+        # A new or deleted file can resolve or break imports in files that did not change
+        for path in (set(self.hashes) if added_or_removed else paths & set(self.hashes)):
+            self.imports[path] = self._imports_of(path)
+
+    def _imports_of(self, path: str) -> Set[str]:
+        language = toolchains.language_for_file(path, self.language)
+        if language is None:
+            return set()
+        if toolchains.TOOLCHAINS[language]['mode'] == 'whole':
+            # Built as one program: every source depends on every other
+            return {other for other in self.hashes
+                    if other != path and toolchains.language_for_file(other) == language}
+        content = (self.project_dir / path).read_text(encoding='utf-8', errors='replace')
+        if language == 'python':
+            return python_imports(self.project_dir, path, content)
+        return relative_imports(self.project_dir, path, content, language)
+
+    def dependents(self, paths: Set[str]) -> Set[str]:
+        """``paths`` plus every file that imports one of them, directly or not"""
+        affected, frontier = set(), set(paths)
+        while frontier:
+            affected |= frontier
+            frontier = {path for path, imported in self.imports.items()
+                        if imported & frontier and path not in affected}
+        return affected
+
+    def dependencies(self, path: str) -> Set[str]:
+        """Every generated file ``path`` imports, directly or not"""
+        found, frontier = set(), set(self.imports.get(path, ()))
+        while frontier:
+            found |= frontier
+            frontier = {dep for current in frontier for dep in self.imports.get(current, ())} - found
+        found.discard(path)
+        return found
+
+    def cache_key(self, path: str) -> str:
+        parts = [path, self.hashes.get(path, ''), str(self.execute)]
+        for dep in sorted(self.dependencies(path)):
+            parts.extend([dep, self.hashes.get(dep, '')])
+        return toolchains._digest(*parts)
+
+    def _verify(self, path: str) -> Dict:
+        verdict = triage.triage_file(self.project_dir, path, self.language, self.build_cache,
+                                     self.exec_timeout, execute=self.execute)
+        if verdict['status'] != 'code':
+            content = (self.project_dir / path).read_text(encoding='utf-8', errors='replace')
+            verdict['lint'] = lint(path, content)
+        return verdict
+
+    def check(self, paths: Set[str]) -> Tuple[Dict[str, Dict], int]:
+        """Verdicts for ``paths``; returns them and how many came from the cache"""
+        paths = sorted(path for path in paths if path in self.hashes)
+        keys = {path: self.cache_key(path) for path in paths}
+        stale = [path for path in paths if keys[path] not in self.cache]
+        verdicts = {path: self.cache[keys[path]] for path in paths if path not in stale}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for path, verdict in zip(stale, pool.map(self._verify, stale)):
+                verdicts[path] = verdict
+                # Environment verdicts go stale without any file changing (pip install,
+                # a toolchain added to PATH), so they are re-checked every time
+                if verdict['status'] != 'environment':
+                    self.cache[keys[path]] = verdict
+        verdicts = {path: verdicts[path] for path in paths}
+        self.verdicts.update(verdicts)
+        if stale:
+            self._save_cache()
+        return verdicts, len(paths) - len(stale)
+
+    def fix_files(self, verdicts: Dict[str, Dict]):
+        """Send files with code defects to the DebuggerAgent, once per hand edit"""
+        broken = {path for path, verdict in verdicts.items()
+                  if verdict['status'] == 'code' and self.written.get(path) != self.hashes.get(path)}
+        # Importers of a broken file often only fail because of it; they are
+        # re-checked once the fixed dependency is written
+        broken = sorted(path for path in broken if not self.dependencies(path) & broken)
+        if not broken:
+            return
+        from debugger import DebuggerAgent
+        agent = DebuggerAgent(self.llm, output_dir=self.project_dir, exec_timeout=self.exec_timeout)
+        agent.language_info = {'language': self.language or 'Unknown'}
+        for path in broken:
+            print(f"\n🔧 Fixing: {path}")
+            content = agent.read_file(path)
+            file_info = self.file_infos.get(path, (path, '', [], []))
+            fixed = agent.recursive_correction(file_info, content,
+                                               code_issues=verdicts[path]['code_issues'])
+            agent.write_file(path, fixed)
+            # Our own write shows up as a change; it is re-checked but not fixed again
+            self.written[path] = toolchains._digest(fixed)
+
+    def report(self, verdicts: Dict[str, Dict]):
+        for path, verdict in verdicts.items():
+            icon = {'ok': '✅', 'environment': '🌐', 'code': '🐛'}[verdict['status']]
+            print(f"{icon} {path}: {verdict['status']}")
+            for issue in verdict['code_issues'] + verdict['environment_issues'] + verdict.get('lint', []):
+                print(f"   - {issue.strip().splitlines()[-1] if issue.strip() else issue}")
+
+    def cycle(self, changed: Set[str]) -> Dict[str, Dict]:
+        """Re-verify ``changed`` files and their importers"""
+        started = time.perf_counter()
+        # Importers of deleted files are only known from the graph before the update
+        affected = self.dependents(changed)
+        self.update_graph(changed)
+        affected |= self.dependents(changed)
+        verdicts, cached = self.check(affected)
+        self.report(verdicts)
+        print(f"🔁 Checked {len(verdicts)} file(s) ({len(changed & set(verdicts))} changed, "
+              f"{cached} from cache) in {time.perf_counter() - started:.2f}s; "
+              f"{sum(v['status'] == 'code' for v in self.verdicts.values())} of {len(self.verdicts)} "
+              f"files have code issues")
+        if self.fix:
+            self.fix_files(verdicts)
+        return verdicts
+
+    def run(self, once: bool = False):
+        """Check everything once, then keep re-checking what changes"""
+        self.snapshot = self.scan()
+        print(f"👀 Watching {self.project_dir} ({self.language or 'unknown language'}, "
+              f"{'inotify' if self.inotify is not None else 'polling'})")
+        self.update_graph(set(self.snapshot))
+        self.cycle(set(self.snapshot))
+        if once:
+            return
+        try:
+            while True:
+                changed = self.wait_for_changes()
+                print(f"\n✏️ Changed: {', '.join(sorted(changed))}")
+                self.cycle(changed)
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Re-check generated files as they are edited")
+    parser.add_argument("project_dir", nargs="?", default="generated_files")
+    parser.add_argument("--blueprint", help="Blueprint of the run (language and file descriptions for --fix)")
+    parser.add_argument("--language", help="Project language, if there is no blueprint")
+    parser.add_argument("--interval", type=float, default=0.5, help="Polling interval in seconds")
+    parser.add_argument("--debounce", type=float, default=0.3, help="Quiet time before re-checking")
+    parser.add_argument("--timeout", type=float, default=10, help="Execution timeout per file")
+    parser.add_argument("--no-exec", action="store_true", help="Static checks only")
+    parser.add_argument("--fix", action="store_true", help="Let the DebuggerAgent fix files with code issues")
+    parser.add_argument("--once", action="store_true", help="Check once and exit")
+    args = parser.parse_args()
+
+    language, file_infos, llm = args.language, {}, None
+    if args.blueprint:
+        import agents_tasks
+        import get_language
+        language = language or get_language.main(args.blueprint)['language']
+        file_infos = {file_info[0]: file_info for file_info in agents_tasks.main(args.blueprint)}
+    if args.fix:
+        # Imported only when fixing: building the pipeline module needs the LLM configuration
+        from main import resilient_llm as llm
+
+    watcher = ProjectWatcher(args.project_dir, language=language, interval=args.interval,
+                             debounce=args.debounce, exec_timeout=args.timeout, execute=not args.no_exec,
+                             fix=args.fix, llm=llm, file_infos=file_infos)
+    watcher.run(once=args.once)
+
+
+if __name__ == "__main__":
+    main_cli()